@@ -9,11 +9,13 @@ from django import forms
 from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
 from django.utils.six import callable
 from django.utils.translation import ugettext_lazy as _
 from parler.admin import TranslatableAdmin
 
 from .cms_appconfig import BlogConfig
+from .export import PostExporter
 from .forms import PostAdminForm
 from .models import BlogCategory, Post
 from .settings import get_setting
@@ -49,6 +51,7 @@ class PostAdmin(PlaceholderAdminMixin, FrontendEditableAdminMixin,
     raw_id_fields = ['author']
     frontend_editable_fields = ('title', 'abstract', 'post_text')
     enhance_exclude = ('main_image', 'tags')
+    actions = ['export_jsonl', 'export_csv']
     _fieldsets = [
         (None, {
             'fields': [('title', 'categories', 'publish', 'app_config')]
@@ -75,6 +78,22 @@ class PostAdmin(PlaceholderAdminMixin, FrontendEditableAdminMixin,
     def languages(self, obj):
         return ','.join(obj.get_available_languages())
 
+    def _export(self, queryset, export_format, content_type):
+        exporter = PostExporter(queryset)
+        response = StreamingHttpResponse(
+            getattr(exporter, export_format)(), content_type=content_type
+        )
+        response['Content-Disposition'] = 'attachment; filename="posts.%s"' % export_format
+        return response
+
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, 'jsonl', 'application/json')
+    export_jsonl.short_description = _('Export selected posts (JSON lines)')
+
+    def export_csv(self, request, queryset):
+        return self._export(queryset, 'csv', 'text/csv')
+    export_csv.short_description = _('Export selected posts (CSV)')
+
     def formfield_for_dbfield(self, db_field, **kwargs):
         field = super(PostAdmin, self).formfield_for_dbfield(db_field, **kwargs)
         if db_field.name == 'meta_description':
@@ -149,7 +168,8 @@ class BlogConfigAdmin(BaseAppHookConfig, TranslatableAdmin):
             ('Layout', {
                 'fields': (
                     'config.paginate_by', 'config.url_patterns', 'config.template_prefix',
-                    'config.menu_structure',
+                    'config.menu_structure', 'config.menu_posts_limit',
+                    'config.menu_selected_category_only', 'config.feed_latest_items',
                 ),
                 'classes': ('collapse',)
             }),
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import hashlib
+import json
+from datetime import MAXYEAR, MINYEAR
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.urlresolvers import reverse
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.template import RequestContext
+from django.utils.encoding import force_bytes, force_text
+from django.utils.http import parse_etags, quote_etag
+from django.utils.translation import get_language
+from django.views.generic import View
+from taggit.models import TaggedItem
+
+from .cache import get_cache_key
+from .models import BlogCategory, Post
+from .rendering import CONTENT_TEMPLATE
+from .settings import get_setting
+from .views import BaseBlogView
+
+User = get_user_model()
+
+
+class BaseApiView(BaseBlogView, View):
+    """
+    Base class for the read-only JSON API views.
+
+    The ``fields`` query string parameter (comma separated list) restricts the
+    serialized fields; related data is only fetched for the requested fields.
+    """
+    available_fields = ()
+    default_fields = ()
+    # field name -> (select_related lookups, prefetch_related lookups)
+    field_relations = {}
+
+    def get_fields(self):
+        requested = self.request.GET.get('fields', '')
+        requested = [field.strip() for field in requested.split(',') if field.strip()]
+        if not requested:
+            return list(self.default_fields)
+        return [field for field in self.available_fields if field in requested]
+
+    def get_related_lookups(self, fields):
+        select, prefetch = [], []
+        for field in fields:
+            field_select, field_prefetch = self.field_relations.get(field, ((), ()))
+            select.extend(item for item in field_select if item not in select)
+            prefetch.extend(item for item in field_prefetch if item not in prefetch)
+        return select, prefetch
+
+    def get_etag_data(self, queryset):
+        """
+        Values changing whenever the serialized data may change
+        """
+        return sorted(queryset.aggregate(
+            modified=Max('date_modified'), count=Count('pk', distinct=True)
+        ).items())
+
+    def get_etag(self, queryset, fields):
+        # the namespace cache key changes with the related data (e.g.: category
+        # names, tags) which the aggregates do not track
+        key = [
+            self.__class__.__name__, get_cache_key(self.namespace), get_language(),
+            sorted(self.kwargs.items()), fields, self.request.GET.get('page', ''),
+            self.get_etag_data(queryset),
+        ]
+        return hashlib.md5(force_bytes(repr(key))).hexdigest()
+
+    def get_data(self, queryset, fields):
+        raise NotImplementedError  # pragma: no cover
+
+    def paginate(self, queryset):
+        paginator = Paginator(queryset, self.config.paginate_by or get_setting('PAGINATION'))
+        try:
+            page = paginator.page(self.request.GET.get('page', 1))
+        except (EmptyPage, PageNotAnInteger):
+            raise Http404
+        return page, {
+            'count': paginator.count,
+            'num_pages': paginator.num_pages,
+            'page': page.number,
+        }
+
+    def get(self, request, *args, **kwargs):
+        fields = self.get_fields()
+        queryset = self.get_queryset()
+        etag = self.get_etag(queryset, fields)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                json.dumps(self.get_data(queryset, fields), cls=DjangoJSONEncoder),
+                content_type='application/json'
+            )
+        response['ETag'] = quote_etag(etag)
+        return response
+
+
+class PostApiMixin(object):
+    model = Post
+    available_fields = (
+        'id', 'title', 'slug', 'url', 'abstract', 'post_text', 'meta_title', 'meta_description',
+        'meta_keywords', 'date_published', 'date_published_end', 'date_modified', 'author',
+        'categories', 'tags', 'main_image', 'content',
+    )
+    default_fields = (
+        'id', 'title', 'slug', 'url', 'abstract', 'date_published', 'author', 'categories',
+        'tags', 'main_image',
+    )
+    field_relations = {
+        'title': ((), ('translations',)),
+        'slug': ((), ('translations',)),
+        'abstract': ((), ('translations',)),
+        'post_text': ((), ('translations',)),
+        'meta_title': ((), ('translations',)),
+        'meta_description': ((), ('translations',)),
+        'meta_keywords': ((), ('translations',)),
+        'url': (('app_config',), ('translations',)),
+        'author': (('author',), ()),
+        'categories': ((), ('categories', 'categories__translations')),
+        'tags': ((), ('tags',)),
+        'main_image': (('main_image',), ()),
+        'content': (('app_config', 'content'), ()),
+    }
+
+    def get_queryset(self):
+        return super(PostApiMixin, self).get_queryset().distinct()
+
+    def get_etag_data(self, queryset):
+        return sorted(queryset.aggregate(
+            modified=Max('date_modified'), content_modified=Max('content_modified'),
+            count=Count('pk', distinct=True)
+        ).items())
+
+    def get_related_lookups(self, fields):
+        select, prefetch = super(PostApiMixin, self).get_related_lookups(fields)
+        urlconf = get_setting('PERMALINK_URLS')[self.config.url_patterns]
+        if 'url' in fields and '<category>' in urlconf and 'categories' not in prefetch:
+            prefetch.append('categories')
+        return select, prefetch
+
+    def prepare_queryset(self, queryset, fields):
+        select, prefetch = self.get_related_lookups(fields)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def serialize_post(self, post, fields):
+        language = get_language()
+        data = {}
+        for field in fields:
+            if field == 'id':
+                data[field] = post.pk
+            elif field == 'url':
+                data[field] = self.request.build_absolute_uri(post.get_absolute_url(language))
+            elif field in ('date_published', 'date_published_end', 'date_modified'):
+                data[field] = getattr(post, field)
+            elif field == 'author':
+                data[field] = None
+                if post.author:
+                    data[field] = {
+                        'username': post.author.get_username(),
+                        'name': post.author.get_full_name(),
+                    }
+            elif field == 'categories':
+                data[field] = [{
+                    'id': category.pk,
+                    'name': category.safe_translation_getter('name'),
+                    'slug': category.safe_translation_getter('slug'),
+                } for category in post.categories.all()]
+            elif field == 'tags':
+                data[field] = [{'name': tag.name, 'slug': tag.slug} for tag in post.tags.all()]
+            elif field == 'main_image':
+                data[field] = None
+                if post.main_image:
+                    data[field] = {
+                        'url': self.request.build_absolute_uri(post.main_image.url),
+                        'alt': post.main_image.default_alt_text,
+                        'width': post.main_image.width,
+                        'height': post.main_image.height,
+                    }
+            elif field == 'content':
+                data[field] = ''
+                if post.app_config.use_placeholder:
+                    context = RequestContext(self.request, {'post': post})
+                    data[field] = force_text(CONTENT_TEMPLATE.render(context))
+            else:
+                data[field] = post.safe_translation_getter(field)
+        return data
+
+
+class PostApiListView(PostApiMixin, BaseApiView):
+    view_url_name = 'djangocms_blog:api-posts'
+
+    def get_queryset(self):
+        qs = super(PostApiListView, self).get_queryset()
+        if self.request.GET.get('category'):
+            qs = qs.filter(
+                categories__translations__slug=self.request.GET['category'],
+                categories__translations__language_code=get_language()
+            )
+        if self.request.GET.get('tag'):
+            qs = qs.filter(tags__slug=self.request.GET['tag'])
+        if self.request.GET.get('author'):
+            qs = qs.filter(**{'author__%s' % User.USERNAME_FIELD: self.request.GET['author']})
+        year = self.get_date_param('year', MINYEAR, MAXYEAR)
+        if year:
+            qs = qs.filter(date_published__year=year)
+        month = self.get_date_param('month', 1, 12)
+        if month:
+            qs = qs.filter(date_published__month=month)
+        return qs
+
+    def get_date_param(self, name, minimum, maximum):
+        value = self.request.GET.get(name)
+        if not value:
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            raise Http404
+        if not minimum <= value <= maximum:
+            raise Http404
+        return value
+
+    def get_data(self, queryset, fields):
+        page, data = self.paginate(self.prepare_queryset(queryset, fields))
+        data['results'] = [self.serialize_post(post, fields) for post in page.object_list]
+        return data
+
+
+class PostApiDetailView(PostApiMixin, BaseApiView):
+    default_fields = PostApiMixin.available_fields
+    view_url_name = 'djangocms_blog:api-post-detail'
+
+    def get_queryset(self):
+        qs = super(PostApiDetailView, self).get_queryset()
+        return qs.translated(get_language(), slug=self.kwargs['slug'])
+
+    def get_data(self, queryset, fields):
+        try:
+            post = self.prepare_queryset(queryset, fields).get()
+        except Post.DoesNotExist:
+            raise Http404
+        return self.serialize_post(post, fields)
+
+
+class CategoryApiListView(BaseApiView):
+    model = BlogCategory
+    available_fields = ('id', 'name', 'slug', 'parent', 'url', 'count')
+    default_fields = available_fields
+    view_url_name = 'djangocms_blog:api-categories'
+
+    def get_posts(self):
+        return Post._default_manager.namespace(self.namespace).published()
+
+    def get_queryset(self):
+        setattr(self.request, get_setting('CURRENT_NAMESPACE'), self.config)
+        return BlogCategory._default_manager.namespace(
+            self.namespace
+        ).active_translations(get_language()).distinct()
+
+    def get_etag_data(self, queryset):
+        data = super(CategoryApiListView, self).get_etag_data(queryset)
+        return data + super(CategoryApiListView, self).get_etag_data(self.get_posts())
+
+    def get_data(self, queryset, fields):
+        queryset = queryset.prefetch_related('translations')
+        if 'url' in fields:
+            queryset = queryset.select_related('app_config')
+        counts = {}
+        if 'count' in fields:
+            counts = dict(
+                self.get_posts().filter(categories__in=queryset.values('pk')).order_by().values(
+                    'categories'
+                ).annotate(count=Count('pk', distinct=True)).values_list('categories', 'count')
+            )
+        results = []
+        for category in queryset:
+            data = {}
+            for field in fields:
+                if field == 'id':
+                    data[field] = category.pk
+                elif field == 'parent':
+                    data[field] = category.parent_id
+                elif field == 'url':
+                    data[field] = self.request.build_absolute_uri(category.get_absolute_url())
+                elif field == 'count':
+                    data[field] = counts.get(category.pk, 0)
+                else:
+                    data[field] = category.safe_translation_getter(field)
+            results.append(data)
+        return {'results': results}
+
+
+class TagApiListView(BaseApiView):
+    model = Post
+    available_fields = ('id', 'name', 'slug', 'url', 'count')
+    default_fields = available_fields
+    view_url_name = 'djangocms_blog:api-tags'
+
+    def get_data(self, queryset, fields):
+        counts = TaggedItem.objects.filter(
+            **TaggedItem.bulk_lookup_kwargs(queryset)
+        ).order_by().values('tag').annotate(count=Count('object_id', distinct=True))
+        counts = dict(counts.values_list('tag', 'count'))
+        tags = TaggedItem.tag_model().objects.filter(pk__in=counts.keys())
+        results = []
+        for tag in sorted(tags, key=lambda x: (-counts[x.pk], x.name)):
+            data = {}
+            for field in fields:
+                if field == 'id':
+                    data[field] = tag.pk
+                elif field == 'url':
+                    data[field] = self.request.build_absolute_uri(reverse(
+                        '%s:posts-tagged' % self.namespace, kwargs={'tag': tag.slug},
+                        current_app=self.namespace
+                    ))
+                elif field == 'count':
+                    data[field] = counts[tag.pk]
+                else:
+                    data[field] = getattr(tag, field)
+            results.append(data)
+        return {'results': results}
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils.encoding import force_bytes
+from django.utils.timezone import now
+
+from .settings import get_setting
+
+ALL_NAMESPACES = ''
+GENERATION_KEY = 'djangocms_blog:generation:%s'
+TRANSITION_KEY = 'djangocms_blog:transition:%s:%s'
+
+
+def _new_generation():
+    # time based, so that an evicted generation counter is never reused
+    return int(time.time() * 1000)
+
+
+def get_generation(namespace=ALL_NAMESPACES):
+    """
+    Returns the current content generation of the given namespace
+    """
+    key = GENERATION_KEY % namespace
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(namespace=ALL_NAMESPACES):
+    """
+    Invalidates the data cached for the given namespace (and the data cached
+    across all the namespaces)
+    """
+    for item in set((ALL_NAMESPACES, namespace or ALL_NAMESPACES)):
+        key = GENERATION_KEY % item
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_generation(), None)
+
+
+def get_next_transition(namespace, generation):
+    """
+    Returns the date of the next scheduled publication or expiration of a
+    post in the given namespace, ``None`` if nothing is scheduled.
+
+    The value is cached per generation and recomputed once the transition date
+    is reached.
+    """
+    from .models import Post
+
+    key = TRANSITION_KEY % (namespace, generation)
+    current = now()
+    cached = cache.get(key)
+    if cached is not None and (cached[0] is None or cached[0] > current):
+        return cached[0]
+    posts = Post._default_manager.filter(publish=True)
+    if namespace:
+        posts = posts.namespace(namespace)
+    dates = [
+        posts.filter(date_published__gt=current).aggregate(
+            date=Min('date_published'))['date'],
+        posts.filter(date_published_end__gt=current).aggregate(
+            date=Min('date_published_end'))['date'],
+    ]
+    dates = [date for date in dates if date]
+    transition = min(dates) if dates else None
+    cache.set(key, (transition,), get_setting('PLUGIN_CACHE_DURATION'))
+    return transition
+
+
+def get_cache_key(namespace, *bits):
+    """
+    Returns a cache key for data depending on the posts of the given namespace
+    (all the namespaces if empty): it changes whenever a post is changed or a
+    scheduled post goes live or expires.
+    """
+    namespace = namespace or ALL_NAMESPACES
+    generation = get_generation(namespace)
+    key = [namespace, generation, get_next_transition(namespace, generation)] + list(bits)
+    return 'djangocms_blog:%s' % hashlib.md5(force_bytes(repr(key))).hexdigest()
@@ -66,6 +66,19 @@ class BlogConfigForm(AppDataForm):
         choices=get_setting('MENU_TYPES'), initial=MENU_TYPE_COMPLETE,
         help_text=_('Structure of the django CMS menu')
     )
+    menu_posts_limit = forms.IntegerField(
+        label=_('Menu posts'), required=False, initial=get_setting('MENU_POSTS_LIMIT'),
+        help_text=_('Number of latest posts shown in the menu for each category (all if empty)')
+    )
+    menu_selected_category_only = forms.BooleanField(
+        label=_('Menu posts of the selected category only'), required=False,
+        initial=get_setting('MENU_SELECTED_CATEGORY_ONLY'),
+        help_text=_('Only show in the menu the posts of the selected category')
+    )
+    feed_latest_items = forms.IntegerField(
+        label=_('Feed items'), required=False, initial=get_setting('FEED_LATEST_ITEMS'),
+        help_text=_('Number of latest posts in the feeds')
+    )
     sitemap_changefreq = forms.ChoiceField(
         label=_('Sitemap changefreq'), required=True,
         choices=get_setting('SITEMAP_CHANGEFREQ'),
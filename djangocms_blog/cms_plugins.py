@@ -2,18 +2,60 @@
 from __future__ import absolute_import, print_function, unicode_literals
 
 import os.path
+from collections import defaultdict
 
 from cms.plugin_base import CMSPluginBase
 from cms.plugin_pool import plugin_pool
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.utils.encoding import force_text
+from django.utils.translation import get_language
 
+from .cache import get_cache_key
 from .forms import LatestEntriesForm
-from .models import AuthorEntriesPlugin, BlogCategory, GenericBlogPlugin, LatestPostsPlugin, Post
+from .loader import get_loader
+from .metrics import measure_render, record_cache
+from .models import AuthorEntriesPlugin, GenericBlogPlugin, LatestPostsPlugin
 from .settings import get_setting
 
 
+def tree_order(categories):
+    """
+    Sorts the categories depth first (siblings by name), setting the ``depth``
+    attribute; categories whose parent is not in the list are handled as roots
+    """
+    pks = set(category.pk for category in categories)
+    children = defaultdict(list)
+    for category in categories:
+        children[category.parent_id if category.parent_id in pks else None].append(category)
+
+    ordered = []
+
+    def add_children(parent, depth):
+        siblings = sorted(children[parent], key=lambda category: force_text(
+            category.safe_translation_getter('name', default='')
+        ).lower())
+        for category in siblings:
+            category.depth = depth
+            ordered.append(category)
+            add_children(category.pk, depth + 1)
+
+    add_children(None, 0)
+    return ordered
+
+
 class BlogPlugin(CMSPluginBase):
     module = get_setting('PLUGIN_MODULE_NAME')
 
+    def render(self, context, instance, placeholder):
+        context = super(BlogPlugin, self).render(context, instance, placeholder)
+        if instance.app_config_id:
+            # share the configuration instance among the plugins in the request
+            instance.app_config = get_loader(context.get('request')).get_config(
+                instance.app_config_id
+            )
+        return context
+
     def get_render_template(self, context, instance, placeholder):
         if instance.app_config and instance.app_config.template_prefix:
             return os.path.join(instance.app_config.template_prefix, self.base_render_template)
@@ -34,9 +76,17 @@ class BlogLatestEntriesPlugin(BlogPlugin):
     cache = False
     base_render_template = 'plugins/latest_entries.html'
 
+    def save_related(self, request, form, formsets, change):
+        super(BlogLatestEntriesPlugin, self).save_related(request, form, formsets, change)
+        form.instance.update_snapshot()
+
+    @measure_render
     def render(self, context, instance, placeholder):
         context = super(BlogLatestEntriesPlugin, self).render(context, instance, placeholder)
-        context['posts_list'] = instance.get_posts(context['request'])
+        # loaded here to be measured, instead of lazily during template rendering
+        context['posts_list'] = list(instance.get_posts(context['request']).select_related(
+            'author', 'app_config', 'main_image'
+        ).prefetch_related('translations', 'categories', 'categories__translations', 'tags'))
         context['TRUNCWORDS_COUNT'] = get_setting('POSTS_LIST_TRUNCWORDS_COUNT')
         return context
 
@@ -44,17 +94,42 @@ class BlogLatestEntriesPlugin(BlogPlugin):
 class BlogLatestEntriesPluginCached(BlogPlugin):
     """
     Cached plugin which returns the latest published posts
+
+    The posts list is cached until a post in the plugin namespace is changed or
+    a scheduled post is published / expires; the django CMS placeholder cache
+    is disabled as it's not aware of posts changes.
     """
-    name = get_setting('LATEST_ENTRIES_PLUGIN_NAME')
+    name = get_setting('LATEST_ENTRIES_PLUGIN_NAME_CACHED')
     model = LatestPostsPlugin
     form = LatestEntriesForm
     filter_horizontal = ('categories',)
     fields = ('app_config', 'latest_posts', 'tags', 'categories')
+    cache = False
     base_render_template = 'plugins/latest_entries.html'
 
+    def get_posts(self, instance):
+        namespace = instance.app_config.namespace if instance.app_config else None
+        key = get_cache_key(
+            namespace, 'latest_entries', instance.pk, instance.changed_date, get_language(),
+            Site.objects.get_current().pk
+        )
+        posts = cache.get(key)
+        record_cache(posts is not None)
+        if posts is None:
+            posts = list(instance.get_posts().select_related(
+                'author', 'app_config', 'main_image'
+            ).prefetch_related('translations', 'categories', 'categories__translations', 'tags'))
+            cache.set(key, posts, get_setting('PLUGIN_CACHE_DURATION'))
+        return posts
+
+    def save_related(self, request, form, formsets, change):
+        super(BlogLatestEntriesPluginCached, self).save_related(request, form, formsets, change)
+        form.instance.update_snapshot()
+
+    @measure_render
     def render(self, context, instance, placeholder):
         context = super(BlogLatestEntriesPluginCached, self).render(context, instance, placeholder)
-        context['posts_list'] = instance.get_posts()
+        context['posts_list'] = self.get_posts(instance)
         context['TRUNCWORDS_COUNT'] = get_setting('POSTS_LIST_TRUNCWORDS_COUNT')
         return context
 
@@ -66,9 +141,10 @@ class BlogAuthorPostsPlugin(BlogPlugin):
     base_render_template = 'plugins/authors.html'
     filter_horizontal = ['authors']
 
+    @measure_render
     def render(self, context, instance, placeholder):
         context = super(BlogAuthorPostsPlugin, self).render(context, instance, placeholder)
-        context['authors_list'] = instance.get_authors()
+        context['authors_list'] = instance.get_authors(get_loader(context.get('request')))
         return context
 
 
@@ -78,13 +154,10 @@ class BlogTagsPlugin(BlogPlugin):
     model = GenericBlogPlugin
     base_render_template = 'plugins/tags.html'
 
+    @measure_render
     def render(self, context, instance, placeholder):
         context = super(BlogTagsPlugin, self).render(context, instance, placeholder)
-        qs = Post._default_manager
-        qs_post = qs
-        if instance.app_config:
-            qs_post = qs_post.namespace(instance.app_config.namespace)
-        context['tags'] = qs.tag_cloud(queryset=qs_post.published())
+        context['tags'] = get_loader(context.get('request')).get_tags(instance.app_config_id)
         return context
 
 
@@ -94,12 +167,19 @@ class BlogCategoryPlugin(BlogPlugin):
     model = GenericBlogPlugin
     base_render_template = 'plugins/categories.html'
 
+    def get_categories(self, instance, loader):
+        """
+        Returns the categories translated in the current language, with the
+        published posts ``count``, in tree order (each with its ``depth``)
+        """
+        return tree_order(loader.get_categories(
+            instance.app_config_id, hide_empty=get_setting('CATEGORY_PLUGIN_HIDE_EMPTY')
+        ))
+
+    @measure_render
     def render(self, context, instance, placeholder):
         context = super(BlogCategoryPlugin, self).render(context, instance, placeholder)
-        qs = BlogCategory._default_manager
-        if instance.app_config:
-            qs = qs.namespace(instance.app_config.namespace)
-        context['categories'] = qs
+        context['categories'] = self.get_categories(instance, get_loader(context.get('request')))
         return context
 
 
@@ -109,17 +189,15 @@ class BlogArchivePlugin(BlogPlugin):
     model = GenericBlogPlugin
     base_render_template = 'plugins/archive.html'
 
+    @measure_render
     def render(self, context, instance, placeholder):
         context = super(BlogArchivePlugin, self).render(context, instance, placeholder)
-        qs = Post._default_manager
-        qs_post = qs
-        if instance.app_config:
-            qs_post = qs.namespace(instance.app_config.namespace)
-        context['dates'] = qs.get_months(queryset=qs_post.published())
+        context['dates'] = get_loader(context.get('request')).get_months(instance.app_config_id)
         return context
 
 
 plugin_pool.register_plugin(BlogLatestEntriesPlugin)
+plugin_pool.register_plugin(BlogLatestEntriesPluginCached)
 plugin_pool.register_plugin(BlogAuthorPostsPlugin)
 plugin_pool.register_plugin(BlogTagsPlugin)
 plugin_pool.register_plugin(BlogArchivePlugin)
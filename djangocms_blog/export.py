@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import csv
+import datetime
+import json
+from collections import defaultdict
+
+from cms.models import CMSPlugin
+from cms.utils.plugins import downcast_plugins
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.urlresolvers import NoReverseMatch
+from django.utils import six
+from django.utils.encoding import force_text
+from django.utils.translation import override
+
+from .models import Post
+from .settings import get_setting
+
+EXPORT_FIELDS = (
+    'id', 'language', 'title', 'slug', 'url', 'abstract', 'post_text', 'meta_title',
+    'meta_description', 'meta_keywords', 'publish', 'date_created', 'date_modified',
+    'date_published', 'date_published_end', 'namespace', 'author', 'main_image',
+    'categories', 'tags', 'sites', 'content',
+)
+
+
+class Echo(object):
+    """
+    File-like object returning the written value, used to stream csv rows
+    """
+    def write(self, value):
+        return value
+
+
+class PostExporter(object):
+    """
+    Generates one row (dictionary) for each post translation.
+
+    Posts are loaded in primary key ordered chunks: each chunk prefetches its
+    translations, categories, tags and sites, thus memory usage does not depend
+    on the number of exported posts (``QuerySet.iterator()`` would discard the
+    prefetch lookups).
+    """
+
+    def __init__(self, queryset=None, languages=None, placeholder_text=False, chunk_size=None):
+        if queryset is None:
+            queryset = Post.objects.all()
+        self.queryset = queryset
+        self.languages = languages
+        self.placeholder_text = placeholder_text
+        self.chunk_size = chunk_size or get_setting('EXPORT_CHUNK_SIZE')
+        self._requests = {}
+
+    @property
+    def fields(self):
+        if self.placeholder_text:
+            return EXPORT_FIELDS
+        return EXPORT_FIELDS[:-1]
+
+    def get_queryset(self):
+        return self.queryset.select_related(
+            'author', 'app_config', 'main_image'
+        ).prefetch_related(
+            'translations', 'categories', 'categories__translations', 'tags', 'sites'
+        ).order_by('pk')
+
+    def iter_chunks(self):
+        queryset = self.get_queryset()
+        last_pk = None
+        while True:
+            chunk = queryset
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            chunk = list(chunk[:self.chunk_size])
+            if not chunk:
+                break
+            yield chunk
+            last_pk = chunk[-1].pk
+
+    def get_request(self, language):
+        from aldryn_search.helpers import get_request
+        if language not in self._requests:
+            self._requests[language] = get_request(language)
+        return self._requests[language]
+
+    def get_placeholder_text(self, posts):
+        """
+        Extracts the text of the plugins in the ``content`` placeholder of the
+        given posts, loading the plugins of the whole chunk at once.
+
+        Returns a dictionary keyed by (placeholder id, language).
+        """
+        from aldryn_search.helpers import get_plugin_index_data
+
+        placeholders = [post.content_id for post in posts if post.content_id]
+        plugins = CMSPlugin.objects.filter(placeholder_id__in=placeholders)
+        if self.languages:
+            plugins = plugins.filter(language__in=self.languages)
+        plugins = plugins.order_by('placeholder_id', 'language', 'position', 'pk')
+        text = defaultdict(list)
+        for plugin in downcast_plugins(plugins):
+            request = self.get_request(plugin.language)
+            text[(plugin.placeholder_id, plugin.language)].append(
+                ' '.join(get_plugin_index_data(plugin, request))
+            )
+        return dict((key, ' '.join(bits)) for key, bits in text.items())
+
+    def get_url(self, post, language):
+        try:
+            # the apphook URL is reversed in the active language
+            with override(language):
+                return post.get_absolute_url(language)
+        except NoReverseMatch:
+            return ''
+
+    def get_row(self, post, translation, content=None):
+        language = translation.language_code
+        row = {
+            'id': post.pk,
+            'language': language,
+            'url': self.get_url(post, language),
+            'publish': post.publish,
+            'date_created': post.date_created,
+            'date_modified': post.date_modified,
+            'date_published': post.date_published,
+            'date_published_end': post.date_published_end,
+            'namespace': post.app_config.namespace if post.app_config_id else '',
+            'author': post.author.get_username() if post.author_id else '',
+            'main_image': post.main_image.url if post.main_image_id else '',
+            'categories': [
+                category.safe_translation_getter('name', language_code=language)
+                for category in post.categories.all()
+            ],
+            'tags': [tag.name for tag in post.tags.all()],
+            'sites': [site.domain for site in post.sites.all()],
+        }
+        for field in ('title', 'slug', 'abstract', 'post_text', 'meta_title',
+                      'meta_description', 'meta_keywords'):
+            row[field] = getattr(translation, field)
+        if self.placeholder_text:
+            row['content'] = content or ''
+        return row
+
+    def rows(self):
+        for chunk in self.iter_chunks():
+            content = {}
+            if self.placeholder_text:
+                content = self.get_placeholder_text(chunk)
+            for post in chunk:
+                translations = sorted(
+                    post.translations.all(), key=lambda translation: translation.language_code
+                )
+                for translation in translations:
+                    if self.languages and translation.language_code not in self.languages:
+                        continue
+                    yield self.get_row(
+                        post, translation,
+                        content.get((post.content_id, translation.language_code))
+                    )
+
+    def jsonl(self):
+        """
+        Yields the rows as JSON lines
+        """
+        for row in self.rows():
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+    def csv(self):
+        """
+        Yields the rows as csv lines, including the header row
+        """
+        writer = csv.writer(Echo())
+        fields = self.fields
+        yield self._csv_line(writer, fields)
+        for row in self.rows():
+            yield self._csv_line(writer, [row[field] for field in fields])
+
+    def _csv_line(self, writer, values):
+        values = [self._csv_value(value) for value in values]
+        if six.PY2:
+            return writer.writerow([value.encode('utf-8') for value in values]).decode('utf-8')
+        return writer.writerow(values)
+
+    def _csv_value(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, (list, tuple)):
+            return ', '.join(force_text(item) for item in value)
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        return force_text(value)
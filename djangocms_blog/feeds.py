@@ -1,21 +1,215 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 
+import copy
+import hashlib
+import re
+
 from aldryn_apphooks_config.utils import get_app_instance
+from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
 from django.contrib.syndication.views import Feed
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.utils.translation import ugettext as _
+from django.http import HttpResponse, HttpResponseNotModified
+from django.template import RequestContext
+from django.utils.cache import patch_vary_headers
+from django.utils.encoding import force_bytes, force_text
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from django.utils.text import compress_string
+from django.utils.translation import get_language, ugettext as _
 
-from .models import Post
+from .cache import get_cache_key
+from .metrics import record_cache
+from .models import BlogCategory, Post
+from .permalinks import PermalinkBuilder
+from .rendering import CONTENT_TEMPLATE
 from .settings import get_setting
 
+User = get_user_model()
+
+RE_ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+CONTENT_KEY = 'djangocms_blog:feed_content:%s'
+ITEM_KEY = '%s:feed_item:%s:%s'
+
+
+def get_item_data(post, builder, language):
+    """
+    Returns the values of the feed item of the post; translations and
+    categories should be prefetched
+    """
+    category = None
+    if 'category' in builder.get_pattern(post.app_config.url_patterns)[1]:
+        # uncategorized posts get the slug permalink
+        category = post.get_first_category()
+    return {
+        'title': post.safe_translation_getter('title'),
+        'abstract': post.safe_translation_getter('abstract'),
+        'post_text': post.safe_translation_getter('post_text'),
+        'link': builder.post_url(post, post.app_config, language, category),
+        'pubdate': post.date_published,
+        'updateddate': post.last_modified,
+    }
+
+
+def get_items_data(posts, namespace, language):
+    """
+    Returns the feed items values of the given posts by post id.
+
+    Values are cached per post and language and shared by all the feeds of
+    the namespace, until a post in the namespace (or the post content) is
+    changed: a post is serialized once, whatever the number of feeds it
+    appears in.
+    """
+    prefix = get_cache_key(namespace, 'feed_items', language)
+    keys = dict(
+        (post.pk, ITEM_KEY % (prefix, post.pk, post.content_modified and
+                              post.content_modified.isoformat()))
+        for post in posts
+    )
+    cached = cache.get_many(list(keys.values()))
+    data = {}
+    for post_id, key in keys.items():
+        record_cache(key in cached)
+        if key in cached:
+            data[post_id] = cached[key]
+    missing = [post_id for post_id in keys if post_id not in data]
+    if missing:
+        builder = PermalinkBuilder()
+        loaded = {}
+        for post in Post._default_manager.filter(pk__in=missing).select_related(
+            'app_config'
+        ).prefetch_related('translations', 'categories', 'categories__translations'):
+            data[post.pk] = loaded[keys[post.pk]] = get_item_data(post, builder, language)
+        cache.set_many(loaded, get_setting('FEED_CACHE_DURATION'))
+    return data
+
+
+def get_posts_content(posts, request, language):
+    """
+    Returns the full HTML content of the given posts by post id: the rendered
+    ``content`` placeholder or the ``post_text``, according to the post
+    configuration.
+
+    Rendered placeholders are cached by post, language and content modification
+    date (see ``Post.content_modified``), so they are rendered again only after
+    a plugin is changed.
+    """
+    contents = {}
+    keys = {}
+    placeholder_posts = []
+    for post in posts:
+        if post.app_config.use_placeholder:
+            key = [post.pk, language, post.content_id, post.content_modified]
+            keys[post.pk] = CONTENT_KEY % hashlib.md5(force_bytes(repr(key))).hexdigest()
+            placeholder_posts.append(post)
+        else:
+            contents[post.pk] = post.safe_translation_getter('post_text') or ''
+    if not keys:
+        return contents
+    cached = cache.get_many(list(keys.values()))
+    rendered = {}
+    for post in placeholder_posts:
+        content = cached.get(keys[post.pk])
+        record_cache(content is not None)
+        if content is None:
+            content = force_text(CONTENT_TEMPLATE.render(RequestContext(request, {'post': post})))
+            rendered[keys[post.pk]] = content
+        contents[post.pk] = content
+    if rendered:
+        cache.set_many(rendered, get_setting('FEED_CACHE_DURATION'))
+    return contents
+
+
+class FullContentAtom1Feed(Atom1Feed):
+    """
+    Atom feed with the items full HTML ``content`` element
+    """
+
+    def add_item_elements(self, handler, item):
+        super(FullContentAtom1Feed, self).add_item_elements(handler, item)
+        if item.get('content'):
+            handler.addQuickElement('content', item['content'], {'type': 'html'})
+
 
 class LatestEntriesFeed(Feed):
+    """
+    Latest posts feed of the current namespace, and base class of the feeds
+    of a subset of the namespace posts (see ``filter_items``).
+
+    Items values are shared between the feeds (see ``get_items_data``); the
+    serialized feed is cached (along with its gzip compressed version) per
+    namespace, language and site, until a post in the namespace is changed or
+    a scheduled post is published / expires; responses carry ``ETag`` and
+    ``Last-Modified`` headers and conditional requests are answered with
+    ``304 Not Modified``.
+    """
 
     def __call__(self, request, *args, **kwargs):
+        # the instance is shared by all the requests (see ``urls``): the request
+        # state is stored on a copy
+        return copy.copy(self).serve(request, *args, **kwargs)
+
+    def serve(self, request, *args, **kwargs):
         self.namespace, self.config = get_app_instance(request)
-        return super(LatestEntriesFeed, self).__call__(request, *args, **kwargs)
+        self.request = request
+        feed = self.get_cached_feed(request, *args, **kwargs)
+        gzipped = RE_ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        etag = '%s-gzip' % feed['etag'] if gzipped else feed['etag']
+        if self.is_not_modified(request, etag, feed['last_modified']):
+            response = HttpResponseNotModified()
+        else:
+            content = feed['gzip_content'] if gzipped else feed['content']
+            response = HttpResponse(content, content_type=feed['content_type'])
+            response['Content-Length'] = str(len(content))
+            if gzipped:
+                response['Content-Encoding'] = 'gzip'
+        response['ETag'] = quote_etag(etag)
+        response['Last-Modified'] = feed['last_modified']
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def get_cache_namespace(self):
+        """
+        Namespace whose posts changes invalidate the cached feed
+        """
+        return self.namespace
+
+    def get_cache_key(self, request, *args, **kwargs):
+        return get_cache_key(
+            self.get_cache_namespace(), 'feed', self.__class__.__name__, get_language(),
+            Site.objects.get_current().pk, request.is_secure(), args, sorted(kwargs.items())
+        )
+
+    def get_cached_feed(self, request, *args, **kwargs):
+        """
+        Returns the cached feed, rendering and storing it if missing
+        """
+        key = self.get_cache_key(request, *args, **kwargs)
+        feed = cache.get(key)
+        record_cache(feed is not None)
+        if feed is None:
+            response = super(LatestEntriesFeed, self).__call__(request, *args, **kwargs)
+            content = response.content
+            feed = {
+                'content': content,
+                'gzip_content': compress_string(content),
+                'content_type': response['Content-Type'],
+                'etag': hashlib.md5(content).hexdigest(),
+                'last_modified': response.get('Last-Modified', http_date()),
+            }
+            cache.set(key, feed, get_setting('FEED_CACHE_DURATION'))
+        return feed
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return etag in etags or '*' in etags
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return bool(if_modified_since and
+                    if_modified_since >= parse_http_date_safe(last_modified))
 
     def link(self):
         return reverse('%s:posts-latest' % self.namespace, current_app=self.namespace)
@@ -23,22 +217,107 @@ class LatestEntriesFeed(Feed):
     def title(self):
         return _('Blog articles on %(site_name)s') % {'site_name': Site.objects.get_current().name}
 
+    def get_queryset(self):
+        """
+        Published posts of the current namespace
+        """
+        return Post.objects.namespace(self.namespace).published().order_by(
+            '-date_published'
+        ).select_related('app_config')
+
+    def filter_items(self, queryset, obj):
+        """
+        Filters the posts queryset according to the feed object
+        """
+        return queryset
+
+    def get_items_count(self):
+        return self.config.feed_latest_items or get_setting('FEED_LATEST_ITEMS')
+
     def items(self, obj=None):
-        return Post.objects.namespace(self.namespace).published().order_by('-date_published')[:10]
+        posts = list(self.filter_items(self.get_queryset(), obj)[:self.get_items_count()])
+        self.items_data = get_items_data(posts, self.namespace, get_language())
+        return posts
 
     def item_title(self, item):
-        return item.safe_translation_getter('title')
+        return self.items_data[item.pk]['title']
 
     def item_description(self, item):
         if get_setting('USE_ABSTRACT'):
-            return item.safe_translation_getter('abstract')
-        return item.safe_translation_getter('post_text')
+            return self.items_data[item.pk]['abstract']
+        return self.items_data[item.pk]['post_text']
+
+    def item_link(self, item):
+        return self.items_data[item.pk]['link']
+
+    def item_pubdate(self, item):
+        return self.items_data[item.pk]['pubdate']
+
+    def item_updateddate(self, item):
+        return self.items_data[item.pk]['updateddate']
 
 
 class TagFeed(LatestEntriesFeed):
 
     def get_object(self, request, tag):
-        return tag  # pragma: no cover
+        return tag
+
+    def link(self, obj):
+        return reverse(
+            '%s:posts-tagged' % self.namespace, kwargs={'tag': obj}, current_app=self.namespace
+        )
+
+    def filter_items(self, queryset, obj):
+        return queryset.filter(tags__slug=obj).distinct()
+
+
+class CategoryFeed(LatestEntriesFeed):
+
+    def get_object(self, request, category):
+        return BlogCategory.objects.active_translations(get_language(), slug=category).get(
+            app_config=self.config
+        )
+
+    def link(self, obj):
+        return obj.get_absolute_url()
+
+    def filter_items(self, queryset, obj):
+        return queryset.filter(categories=obj.pk)
+
+
+class AuthorFeed(LatestEntriesFeed):
+
+    def get_object(self, request, username):
+        return User.objects.get(**{User.USERNAME_FIELD: username})
+
+    def link(self, obj):
+        return reverse(
+            '%s:posts-author' % self.namespace, kwargs={'username': obj.get_username()},
+            current_app=self.namespace
+        )
+
+    def filter_items(self, queryset, obj):
+        return queryset.filter(author=obj)
+
+
+class LatestEntriesAtomFeed(LatestEntriesFeed):
+    """
+    Latest posts Atom feed of the current namespace, with the posts abstract
+    as summary and their full content.
+
+    The cached feed is invalidated along with the namespace cached data when
+    the content of a post is changed (see ``update_content_modified``); the
+    rendered contents are stored on the per request copy of the feed.
+    """
+    feed_type = FullContentAtom1Feed
 
     def items(self, obj=None):
-        return Post.objects.published().filter(tags__slug=obj)[:10]
+        posts = list(super(LatestEntriesAtomFeed, self).items(obj))
+        self.contents = get_posts_content(posts, self.request, get_language())
+        return posts
+
+    def item_description(self, item):
+        return self.items_data[item.pk]['abstract']
+
+    def item_extra_kwargs(self, item):
+        return {'content': self.contents.get(item.pk, '')}
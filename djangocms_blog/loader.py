@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.translation import get_language
+from parler.utils.i18n import get_active_language_choices
+from taggit.models import TaggedItem
+
+from .cms_appconfig import BlogConfig
+from .models import BlogCategory, Post
+from .settings import get_setting
+
+
+class BlogDataLoader(object):
+    """
+    Loads and memoizes the data shared by the blog plugins rendered in the
+    same request (published posts, categories, tags, archive and authors
+    counts), so that each of them is fetched once per namespace.
+
+    Data is keyed by the ``BlogConfig`` id (``None`` for all the namespaces).
+    """
+
+    def __init__(self):
+        self._data = {}
+
+    def _memoize(self, key, func, *args):
+        if key not in self._data:
+            self._data[key] = func(*args)
+        return self._data[key]
+
+    def _config(self, app_config_id):
+        return BlogConfig.objects.get(pk=app_config_id)
+
+    def get_config(self, app_config_id):
+        return self._memoize(('config', app_config_id), self._config, app_config_id)
+
+    def published_posts(self, app_config_id=None):
+        """
+        Queryset of the posts visible on the current site
+        """
+        posts = Post._default_manager.published()
+        if app_config_id:
+            posts = posts.filter(app_config_id=app_config_id)
+        return posts
+
+    def _author_counts(self, app_config_id):
+        return dict(self.published_posts(app_config_id).order_by().values('author').annotate(
+            count=Count('pk', distinct=True)
+        ).values_list('author', 'count'))
+
+    def get_author_counts(self, app_config_id=None):
+        """
+        Published posts count by author id
+        """
+        return self._memoize(('author_counts', app_config_id), self._author_counts, app_config_id)
+
+    def _months(self, app_config_id):
+        posts = self.published_posts(app_config_id)
+        operations = connections[posts.db].ops
+        field = '%s.%s' % (
+            operations.quote_name(Post._meta.db_table), operations.quote_name('date_published')
+        )
+        tzname = timezone.get_current_timezone_name() if settings.USE_TZ else None
+        year_sql, params = operations.datetime_extract_sql('year', field, tzname)
+        month_sql, month_params = operations.datetime_extract_sql('month', field, tzname)
+        counts = posts.order_by().extra(
+            select={'month': '(%s) * 100 + (%s)' % (year_sql, month_sql)},
+            select_params=list(params) + list(month_params)
+        ).values('month').annotate(count=Count('pk', distinct=True)).values_list('month', 'count')
+        months = sorted(
+            ((divmod(int(month), 100), count) for month, count in counts), reverse=True
+        )
+        return [{'date': timezone.now().replace(year=year, month=month, day=1), 'count': count}
+                for (year, month), count in months]
+
+    def get_months(self, app_config_id=None):
+        """
+        Same as ``GenericDateTaggedManager.get_months`` for published posts,
+        counted by the database
+        """
+        return self._memoize(('months', app_config_id), self._months, app_config_id)
+
+    def _category_counts(self, app_config_id):
+        return dict(Post.categories.through.objects.filter(
+            post_id__in=self.published_posts(app_config_id).values('pk')
+        ).order_by().values('blogcategory').annotate(
+            count=Count('post', distinct=True)
+        ).values_list('blogcategory', 'count'))
+
+    def get_category_counts(self, app_config_id=None):
+        """
+        Published posts count by category id
+        """
+        return self._memoize(
+            ('category_counts', app_config_id), self._category_counts, app_config_id
+        )
+
+    def _categories(self, app_config_id, language, hide_empty):
+        categories = BlogCategory._default_manager.all()
+        if app_config_id:
+            categories = categories.filter(app_config_id=app_config_id)
+        categories = categories.filter(pk__in=BlogCategory._default_manager.translated(
+            *get_active_language_choices(language)
+        ).values('pk'))
+        if hide_empty:
+            categories = categories.filter(
+                pk__in=self.published_posts(app_config_id).values('categories')
+            )
+        counts = self.get_category_counts(app_config_id)
+        categories = list(categories.prefetch_related('translations'))
+        for category in categories:
+            category.count = counts.get(category.pk, 0)
+        return categories
+
+    def get_categories(self, app_config_id=None, hide_empty=False):
+        """
+        Categories translated in the current language, with translations loaded
+        and the published posts ``count``; if ``hide_empty``, categories without
+        published posts are excluded
+        """
+        language = get_language()
+        return self._memoize(
+            ('categories', app_config_id, language, hide_empty), self._categories,
+            app_config_id, language, hide_empty
+        )
+
+    def _tags(self, app_config_id):
+        counts = dict(TaggedItem.objects.filter(
+            **TaggedItem.bulk_lookup_kwargs(self.published_posts(app_config_id))
+        ).order_by().values('tag').annotate(
+            count=Count('object_id', distinct=True)
+        ).values_list('tag', 'count'))
+        tags = list(TaggedItem.tag_model().objects.filter(pk__in=counts.keys()))
+        for tag in tags:
+            tag.count = counts[tag.pk]
+        return sorted(tags, key=lambda tag: -tag.count)
+
+    def get_tags(self, app_config_id=None):
+        """
+        Tags used by published posts, with the posts ``count``, most used first
+        """
+        return self._memoize(('tags', app_config_id), self._tags, app_config_id)
+
+
+def get_loader(request):
+    """
+    Returns the loader attached to the request, creating it if needed
+    """
+    if request is None:
+        return BlogDataLoader()
+    attribute = get_setting('CURRENT_LOADER')
+    loader = getattr(request, attribute, None)
+    if loader is None:
+        loader = BlogDataLoader()
+        setattr(request, attribute, loader)
+    return loader
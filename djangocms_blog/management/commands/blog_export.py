@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import io
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangocms_blog.export import PostExporter
+from djangocms_blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Export blog posts as JSON lines or csv, one row per post translation'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--format', dest='format', default='jsonl', choices=('jsonl', 'csv'),
+                    help='Output format: jsonl (default) or csv'),
+        make_option('--output', dest='output', default=None,
+                    help='Output file (default: standard output)'),
+        make_option('--language', dest='languages', action='append', default=[],
+                    help='Only export the given language (can be repeated)'),
+        make_option('--namespace', dest='namespace', default=None,
+                    help='Only export posts of the given apphook configuration'),
+        make_option('--published', dest='published', action='store_true', default=False,
+                    help='Only export published posts'),
+        make_option('--placeholder-text', dest='placeholder_text', action='store_true',
+                    default=False, help='Add the text of the post content placeholder'),
+        make_option('--chunk-size', dest='chunk_size', type='int', default=None,
+                    help='Number of posts loaded per query'),
+    )
+
+    def handle(self, *args, **options):
+        if options['format'] not in ('jsonl', 'csv'):
+            raise CommandError('Unknown format %s' % options['format'])
+        queryset = Post.objects.all()
+        if options['namespace']:
+            queryset = queryset.namespace(options['namespace'])
+        if options['published']:
+            queryset = queryset.published()
+        exporter = PostExporter(
+            queryset, languages=options['languages'],
+            placeholder_text=options['placeholder_text'], chunk_size=options['chunk_size'],
+        )
+        lines = getattr(exporter, options['format'])()
+        if options['output']:
+            with io.open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                for line in lines:
+                    output.write(line)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from djangocms_blog.cms_appconfig import BlogConfig
+from djangocms_blog.snapshots import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the blog menu snapshots for all the languages'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--namespace', dest='namespace', default=None,
+                    help='Only rebuild the snapshots of the given apphook configuration'),
+    )
+
+    def handle(self, *args, **options):
+        configs = BlogConfig.objects.all()
+        if options['namespace']:
+            configs = configs.filter(namespace=options['namespace'])
+        count = rebuild_snapshots(configs)
+        if int(options.get('verbosity', 1)):
+            self.stdout.write('Rebuilt %d menu snapshots' % count)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import os
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from haystack import connections as haystack_connections
+
+from djangocms_blog.reindex import get_post_index, reindex_posts
+from djangocms_blog.settings import get_setting
+
+
+class Command(BaseCommand):
+    help = ('Update the posts in the search index in chunks of posts, resuming after the '
+            'last chunk sent by an interrupted run')
+
+    option_list = BaseCommand.option_list + (
+        make_option('--using', dest='using', action='append', default=[],
+                    help='Update only the given haystack connection (can be repeated)'),
+        make_option('--batch-size', dest='batch_size', type='int', default=None,
+                    help='Number of posts sent to the search backend at once'),
+        make_option('--workers', dest='workers', type='int', default=None,
+                    help='Number of worker processes'),
+        make_option('--state', dest='state', default=None,
+                    help='File storing the id of the last post sent to each connection'),
+        make_option('--restart', dest='restart', action='store_true', default=False,
+                    help='Update all the posts, ignoring the stored state'),
+    )
+
+    def handle(self, *args, **options):
+        aliases = options['using'] or [
+            using for using in sorted(haystack_connections.connections_info)
+            if get_post_index(using) is not None
+        ]
+        for using in aliases:
+            if using not in haystack_connections.connections_info:
+                raise CommandError('Unknown haystack connection %s' % using)
+        batch_size = options['batch_size'] or get_setting('SEARCH_BATCH_SIZE')
+        workers = options['workers'] or get_setting('SEARCH_WORKERS')
+        state = options['state'] or get_setting('SEARCH_STATE_FILE')
+        if state and options['restart'] and os.path.exists(state):
+            os.remove(state)
+        verbosity = int(options.get('verbosity', 1))
+        started = time.time()
+        total = 0
+        for using, first, last, count in reindex_posts(aliases, batch_size, workers, state):
+            total += count
+            if verbosity > 1:
+                self.stdout.write('%s: posts %s-%s, %d indexed (%.1f posts/s)' % (
+                    using, first, last, count, total / max(time.time() - started, 0.001)
+                ))
+        if verbosity:
+            elapsed = time.time() - started
+            self.stdout.write('%d posts indexed in %.1f seconds (%.1f posts/s)' % (
+                total, elapsed, total / max(elapsed, 0.001)
+            ))
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+from optparse import make_option
+
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand, CommandError
+
+from djangocms_blog.settings import get_setting
+from djangocms_blog.sitemaps.files import GENERATED, REMOVED, SKIPPED, generate_sitemaps
+
+try:
+    from collections import Counter
+except ImportError:
+    from djangocms_blog.compat import Counter
+
+
+class Command(BaseCommand):
+    help = ('Write the blog sitemaps and sitemap index as gzip compressed files, '
+            'skipping the sitemaps whose posts are not changed since the last run')
+
+    option_list = BaseCommand.option_list + (
+        make_option('--directory', dest='directory', default=None,
+                    help='Directory the files are written to'),
+        make_option('--url', dest='url', default=None,
+                    help='URL the directory is served from'),
+        make_option('--domain', dest='domain', default=None,
+                    help='Domain of the posts URLs (current site domain by default)'),
+        make_option('--protocol', dest='protocol', default='http',
+                    help='Protocol of the posts URLs'),
+        make_option('--workers', dest='workers', type='int', default=None,
+                    help='Number of worker processes'),
+        make_option('--force', dest='force', action='store_true', default=False,
+                    help='Write all the sitemaps'),
+    )
+
+    def handle(self, *args, **options):
+        directory = options['directory'] or get_setting('SITEMAP_DIRECTORY')
+        if not directory:
+            raise CommandError(
+                'Provide the --directory option or the BLOG_SITEMAP_DIRECTORY setting'
+            )
+        domain = options['domain'] or Site.objects.get_current().domain
+        url = options['url'] or get_setting('SITEMAP_URL') or '%s://%s/' % (
+            options['protocol'], domain
+        )
+        if not url.endswith('/'):
+            url += '/'
+        workers = options['workers'] or get_setting('SITEMAP_WORKERS')
+        verbosity = int(options.get('verbosity', 1))
+        results = Counter()
+        for name, result in generate_sitemaps(
+                directory, url, domain, options['protocol'], workers, options['force']):
+            results[result] += 1
+            if verbosity > 1:
+                self.stdout.write('%s: %s' % (name, result))
+        if verbosity:
+            self.stdout.write('%d sitemaps: %d %s, %d %s, %d %s' % (
+                results[GENERATED] + results[SKIPPED], results[GENERATED], GENERATED,
+                results[SKIPPED], SKIPPED, results[REMOVED], REMOVED
+            ))
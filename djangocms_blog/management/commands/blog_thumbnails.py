@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from djangocms_blog.models import Post
+from djangocms_blog.settings import get_setting
+from djangocms_blog.thumbnails import (
+    FAILED, GENERATED, SKIPPED, get_thumbnails, pregenerate_thumbnails,
+)
+
+try:
+    from collections import Counter
+except ImportError:
+    from djangocms_blog.compat import Counter
+
+
+class Command(BaseCommand):
+    help = 'Generate the thumbnails of the posts main images, skipping the existing ones'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--namespace', dest='namespace', default=None,
+                    help='Only process posts of the given apphook configuration'),
+        make_option('--published', dest='published', action='store_true', default=False,
+                    help='Only process published posts'),
+        make_option('--workers', dest='workers', type='int', default=None,
+                    help='Number of worker processes'),
+    )
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.all()
+        if options['namespace']:
+            queryset = queryset.namespace(options['namespace'])
+        if options['published']:
+            queryset = queryset.published()
+        thumbnails = list(get_thumbnails(queryset))
+        total = len(thumbnails)
+        workers = options['workers'] or get_setting('THUMBNAIL_WORKERS')
+        verbosity = int(options.get('verbosity', 1))
+        results = Counter()
+        for index, (image_id, result) in enumerate(
+                pregenerate_thumbnails(thumbnails, workers), 1):
+            results[result] += 1
+            if verbosity > 1:
+                self.stdout.write('%d/%d image %s: %s' % (index, total, image_id, result))
+        if verbosity:
+            self.stdout.write('%d thumbnails: %d %s, %d %s, %d %s' % (
+                total, results[GENERATED], GENERATED, results[SKIPPED], SKIPPED,
+                results[FAILED], FAILED
+            ))
@@ -1,21 +1,46 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
 from cms.menu_bases import CMSAttachMenu
-from django.db.models.signals import post_delete, post_save
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.timezone import now
 from django.utils.translation import get_language_from_request, ugettext_lazy as _
-from menus.base import NavigationNode
+from menus.base import Modifier, NavigationNode
 from menus.menu_pool import menu_pool
+from parler.utils.i18n import get_active_language_choices
 
+from .cache import get_generation, get_next_transition
 from .cms_appconfig import BlogConfig
 from .models import BlogCategory, Post
 from .settings import MENU_TYPE_CATEGORIES, MENU_TYPE_COMPLETE, MENU_TYPE_POSTS
+from .snapshots import (
+    CATEGORY_ID, CATEGORY_PARENT, CATEGORY_TITLE, CATEGORY_URL, POST_CATEGORY, POST_ID,
+    POST_PUBLISHED, POST_PUBLISHED_END, POST_SITES, POST_TITLE, POST_URL, get_snapshot,
+)
+
+MENU_TRANSITION_KEY = 'djangocms_blog:menu_transition:%s:%s'
+
+
+def get_transition_key(language):
+    return MENU_TRANSITION_KEY % (Site.objects.get_current().pk, language)
 
 
 class BlogCategoryMenu(CMSAttachMenu):
     name = _('Blog menu')
 
     def get_nodes(self, request):
+        """
+        Builds the nodes from the namespace snapshot (see
+        :py:mod:`djangocms_blog.snapshots`), built if missing with a fixed
+        number of queries
+        """
         nodes = []
 
         language = get_language_from_request(request, check_path=True)
@@ -29,51 +54,248 @@ class BlogCategoryMenu(CMSAttachMenu):
             categories_menu = True
         if config and config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_POSTS):
             posts_menu = True
+        if not categories_menu and not posts_menu:
+            return nodes
+
+        snapshot = get_snapshot(config, language)
+        site_id = Site.objects.get_current().pk
 
+        menu_categories = set()
         if categories_menu:
-            categories = BlogCategory.objects
-            if config:
-                categories = categories.namespace(self.instance.application_namespace)
-            categories = categories.active_translations(language).distinct()
-            categories = categories.order_by('parent__id', 'translations__name')
-            for category in categories:
+            menu_categories = set(entry[CATEGORY_ID] for entry in snapshot['categories'])
+            for entry in snapshot['categories']:
                 node = NavigationNode(
-                    category.name,
-                    category.get_absolute_url(),
-                    '%s-%s' % (category.__class__.__name__, category.pk),
-                    ('%s-%s' % (category.__class__.__name__, category.parent.id) if category.parent
-                     else None)
+                    entry[CATEGORY_TITLE],
+                    entry[CATEGORY_URL],
+                    '%s-%s' % (BlogCategory.__name__, entry[CATEGORY_ID]),
+                    ('%s-%s' % (BlogCategory.__name__, entry[CATEGORY_PARENT])
+                     if entry[CATEGORY_PARENT] in menu_categories else None)
                 )
                 nodes.append(node)
 
         if posts_menu:
-            posts = Post.objects
-            if hasattr(self, 'instance') and self.instance:
-                posts = posts.namespace(self.instance.application_namespace)
-            posts = posts.active_translations(language).distinct()
-            for post in posts:
-                if categories_menu:
-                    category = post.categories.first()
-                    parent = '%s-%s' % (category.__class__.__name__, category.pk)
-                    post_id = '%s-%s' % (post.__class__.__name__, post.pk),
-                else:
-                    parent = None
-                    post_id = '%s-%s' % (post.__class__.__name__, post.pk),
+            current = now()
+            limit = config.menu_posts_limit
+            counts = defaultdict(int)
+            for entry in snapshot['posts']:
+                if entry[POST_SITES] and site_id not in entry[POST_SITES]:
+                    continue
+                if entry[POST_PUBLISHED] > current or (
+                        entry[POST_PUBLISHED_END] and entry[POST_PUBLISHED_END] < current):
+                    continue
+                category_id = entry[POST_CATEGORY]
+                if limit:
+                    # latest posts for each parent category (or overall if no categories in menu)
+                    group = category_id if categories_menu else None
+                    if counts[group] >= limit:
+                        continue
+                    counts[group] += 1
+                parent = None
+                if category_id in menu_categories:
+                    parent = '%s-%s' % (BlogCategory.__name__, category_id)
                 node = NavigationNode(
-                    post.get_title(),
-                    post.get_absolute_url(language),
-                    post_id,
-                    parent
+                    entry[POST_TITLE],
+                    entry[POST_URL],
+                    '%s-%s' % (Post.__name__, entry[POST_ID]),
+                    parent,
+                    attr={'blog_post': True, 'selected_only': bool(
+                        parent and config.menu_selected_category_only
+                    )}
                 )
                 nodes.append(node)
+            self.register_transition(config.namespace, language)
+
+        return nodes
+
+    def register_transition(self, namespace, language):
+        """
+        Stores the date of the next scheduled publication / expiration of the
+        namespace posts, when the menu must be rebuilt (see ``BlogNavModifier``)
+        """
+        transition = get_next_transition(namespace, get_generation(namespace))
+        if transition:
+            key = get_transition_key(language)
+            current = cache.get(key)
+            if not current or transition < current:
+                cache.set(key, transition, None)
+
 
+class BlogNavModifier(Modifier):
+    """
+    Clears the menu cache when a post scheduled publication / expiration date
+    is reached, and hides the post nodes outside the selected category, for
+    the blog configurations showing only the posts of the selected category.
+
+    The menu nodes are cached, thus this is done on the cached nodes.
+    """
+
+    def modify(self, request, nodes, namespace, root_id, post_cut, breadcrumb):
+        if post_cut or breadcrumb:
+            return nodes
+        language = get_language_from_request(request, check_path=True)
+        key = get_transition_key(language)
+        transition = cache.get(key)
+        if transition and transition <= now():
+            # the menu is rebuilt at the next request
+            cache.delete(key)
+            invalidate_menu([Site.objects.get_current().pk], [language])
+        selected = None
+        for node in nodes:
+            if node.selected:
+                selected = node
+                break
+        category = None
+        if selected and selected.attr.get('blog_post'):
+            category = selected.parent
+        elif selected:
+            category = selected
+        for node in list(nodes):
+            if not node.attr.get('selected_only') or node.selected:
+                continue
+            if category is not None and node.parent is category:
+                continue
+            nodes.remove(node)
+            if node.parent:
+                node.parent.children.remove(node)
         return nodes
 
+
 menu_pool.register_menu(BlogCategoryMenu)
+menu_pool.register_modifier(BlogNavModifier)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def menu_invalidation_batch():
+    """
+    Defers the menu cache invalidations until the end of the block, clearing
+    each site / language menu once; use it when saving many posts at once::
+
+        with menu_invalidation_batch():
+            for data in rows:
+                Post.objects.create(**data)
+    """
+    if getattr(_local, 'pending', None) is not None:
+        # nested batch: invalidation is done by the outer one
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+    finally:
+        pending, _local.pending = _local.pending, None
+        clear_menus(pending)
+
+
+def clear_menus(scopes):
+    """
+    Clears the menu cache for the given (site id, language) couples, ``None``
+    meaning all sites / languages
+    """
+    scopes = set(scopes)
+    for site_id, language in sorted(scopes, key=lambda scope: (
+            scope[0] is not None, scope[1] is not None, scope)):
+        if site_id is not None and ((None, language) in scopes or (None, None) in scopes):
+            continue
+        if language is not None and ((site_id, None) in scopes or (None, None) in scopes):
+            continue
+        menu_pool.clear(site_id, language)
+
+
+def get_menu_languages(languages):
+    """
+    Returns the languages whose menu may show content translated in the given
+    languages, thus including the ones using them as fallback
+    """
+    languages = set(languages)
+    return set(
+        code for code, __ in settings.LANGUAGES
+        if languages.intersection(get_active_language_choices(code))
+    )
+
+
+def invalidate_menu(sites, languages):
+    """
+    Clears (or schedules the clear, inside ``menu_invalidation_batch``) the menu
+    cache of the given sites and languages; ``None`` means all
+    """
+    scopes = set((site_id, language) for site_id in sites or (None,)
+                 for language in languages or (None,))
+    if getattr(_local, 'pending', None) is not None:
+        _local.pending.update(scopes)
+    else:
+        clear_menus(scopes)
+
+
+def _config_menu(app_config_id, *structures):
+    if not app_config_id:
+        return False
+    config = BlogConfig.objects.filter(pk=app_config_id).first()
+    return config is not None and config.menu_structure in structures
+
+
+def clear_post_menu_cache(sender, instance, **kwargs):
+    if kwargs.get('raw') or not _config_menu(
+            instance.app_config_id, MENU_TYPE_COMPLETE, MENU_TYPE_POSTS):
+        return
+    if kwargs.get('signal') == post_delete:
+        # translations and sites are already deleted
+        invalidate_menu(None, None)
+        return
+    languages = get_menu_languages(instance.get_available_languages(include_unsaved=True))
+    if not languages:
+        return
+    invalidate_menu(list(instance.sites.values_list('pk', flat=True)), languages)
+
+
+def clear_post_relations_menu_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        posts = Post._default_manager.all()
+        if pk_set:
+            posts = posts.filter(pk__in=pk_set)
+        for post in posts:
+            clear_post_menu_cache(Post, post)
+    else:
+        # changed sites may not include the previous ones: clear all the sites
+        if _config_menu(instance.app_config_id, MENU_TYPE_COMPLETE, MENU_TYPE_POSTS):
+            invalidate_menu(None, get_menu_languages(
+                instance.get_available_languages(include_unsaved=True)
+            ))
+
+
+def clear_post_translation_menu_cache(sender, instance, **kwargs):
+    if _config_menu(Post._default_manager.filter(pk=instance.master_id).values_list(
+            'app_config_id', flat=True).first(), MENU_TYPE_COMPLETE, MENU_TYPE_POSTS):
+        invalidate_menu(None, get_menu_languages([instance.language_code]))
+
+
+def clear_category_menu_cache(sender, instance, **kwargs):
+    if kwargs.get('raw') or not _config_menu(
+            instance.app_config_id, MENU_TYPE_COMPLETE, MENU_TYPE_CATEGORIES):
+        return
+    if kwargs.get('signal') == post_delete:
+        invalidate_menu(None, None)
+        return
+    invalidate_menu(None, get_menu_languages(
+        instance.get_available_languages(include_unsaved=True)
+    ))
+
 
+def clear_config_menu_cache(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        invalidate_menu(None, None)
 
-def clear_menu_cache(**kwargs):
-    menu_pool.clear(all=True)
 
-post_save.connect(clear_menu_cache, sender=BlogCategory)
-post_delete.connect(clear_menu_cache, sender=BlogCategory)
+post_save.connect(clear_post_menu_cache, sender=Post)
+post_delete.connect(clear_post_menu_cache, sender=Post)
+post_delete.connect(clear_post_translation_menu_cache, sender=Post._parler_meta.root_model)
+post_save.connect(clear_category_menu_cache, sender=BlogCategory)
+post_delete.connect(clear_category_menu_cache, sender=BlogCategory)
+post_save.connect(clear_config_menu_cache, sender=BlogConfig)
+post_delete.connect(clear_config_menu_cache, sender=BlogConfig)
+m2m_changed.connect(clear_post_relations_menu_cache, sender=Post.categories.through)
+m2m_changed.connect(clear_post_relations_menu_cache, sender=Post.sites.through)
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import logging
+import re
+import socket
+import threading
+import time
+from functools import wraps
+
+from django.core.signals import request_finished
+from django.db import connections
+from django.utils.encoding import force_text
+
+from .settings import get_setting
+
+try:
+    from django.utils.module_loading import import_string
+except ImportError:  # pragma: no cover
+    from django.utils.module_loading import import_by_path as import_string
+
+logger = logging.getLogger(__name__)
+
+RE_STATSD_UNSAFE = re.compile(r'[^\w-]+')
+
+_local = threading.local()
+_sinks = {}
+
+
+class LoggingSink(object):
+    """
+    Logs the metrics on the ``djangocms_blog.metrics`` logger
+    """
+
+    def record(self, name, metrics, tags):
+        logger.info(
+            '%s %s %s', name,
+            ' '.join('%s=%s' % item for item in sorted(metrics.items())),
+            ' '.join('%s=%s' % item for item in sorted(tags.items()))
+        )
+
+
+class MemorySink(object):
+    """
+    Keeps the metrics in memory, mostly useful for tests and debugging
+    """
+    records = []
+
+    def record(self, name, metrics, tags):
+        self.records.append((name, metrics, tags))
+
+    @classmethod
+    def clear(cls):
+        del cls.records[:]
+
+
+class StatsdSink(object):
+    """
+    Sends the metrics to a statsd compatible server via UDP: durations as timers,
+    the other values as counters; tags are sent in the DogStatsD format or, if
+    ``BLOG_METRICS_STATSD_TAGS`` is disabled, appended to the metrics name
+    """
+    timers = ('time', 'query_time')
+
+    def __init__(self):
+        self.address = (get_setting('METRICS_STATSD_HOST'), get_setting('METRICS_STATSD_PORT'))
+        self.prefix = get_setting('METRICS_STATSD_PREFIX')
+        self.use_tags = get_setting('METRICS_STATSD_TAGS')
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def clean(self, value):
+        return RE_STATSD_UNSAFE.sub('_', force_text(value)).strip('_') or '_'
+
+    def format(self, name, metrics, tags=None):
+        tags = sorted((key, value) for key, value in (tags or {}).items() if value is not None)
+        suffix = ''
+        if tags and self.use_tags:
+            suffix = '|#%s' % ','.join(
+                '%s:%s' % (self.clean(key), self.clean(value)) for key, value in tags
+            )
+        elif tags:
+            name = '.'.join([name] + [self.clean(value) for __, value in tags])
+        return '\n'.join(
+            '%s.%s.%s:%s|%s%s' % (
+                self.prefix, name, metric, value, 'ms' if metric in self.timers else 'c', suffix
+            ) for metric, value in sorted(metrics.items())
+        )
+
+    def record(self, name, metrics, tags):
+        try:
+            self.socket.sendto(self.format(name, metrics, tags).encode('utf-8'), self.address)
+        except socket.error:
+            logger.debug('Error sending metrics to %s:%s', *self.address)
+
+
+def get_sink():
+    """
+    Returns the instance of the ``BLOG_METRICS_SINK`` class, ``None`` if
+    metrics are disabled
+    """
+    path = get_setting('METRICS_SINK')
+    if not path:
+        return None
+    if path not in _sinks:
+        _sinks[path] = import_string(path)()
+    return _sinks[path]
+
+
+class CountingCursorWrapper(object):
+    """
+    Cursor wrapper adding the executed queries count and time to a
+    ``QueryCounter``, without keeping the SQL
+    """
+
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self, method, *args):
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            self.counter.count += 1
+            self.counter.time += time.time() - start
+
+    def execute(self, sql, params=None):
+        return self._run(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self._run(self.cursor.executemany, sql, param_list)
+
+
+class QueryCounter(object):
+    """
+    Counts the queries run on the database connections of the current thread
+    while installed, wrapping the cursors they return
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self._previous = {}
+
+    def install(self):
+        for connection in connections.all():
+            # cursor may already be overridden on the instance by other tools
+            self._previous[connection.alias] = connection.__dict__.get('cursor')
+            connection.cursor = self._wrap(connection.cursor)
+
+    def _wrap(self, cursor):
+        def wrapper(*args, **kwargs):
+            return CountingCursorWrapper(cursor(*args, **kwargs), self)
+        return wrapper
+
+    def uninstall(self):
+        for connection in connections.all():
+            if connection.alias not in self._previous:
+                continue
+            previous = self._previous.pop(connection.alias)
+            if previous is None:
+                del connection.cursor
+            else:
+                connection.cursor = previous
+
+
+def _active():
+    if not hasattr(_local, 'measurements'):
+        _local.measurements = []
+    return _local.measurements
+
+
+def _counter():
+    if not hasattr(_local, 'counter'):
+        _local.counter = QueryCounter()
+    return _local.counter
+
+
+def _activate(measurement):
+    if not _active():
+        _counter().install()
+    _active().append(measurement)
+
+
+def _deactivate(measurement):
+    if measurement in _active():
+        _active().remove(measurement)
+        if not _active():
+            _counter().uninstall()
+
+
+class Measurement(object):
+    """
+    Measures wall time, database queries count and time and blog cache hits /
+    misses between ``start`` and ``stop`` (or in a ``with`` block), and sends
+    them to the sink
+    """
+
+    def __init__(self, sink, name, **tags):
+        self.sink = sink
+        self.name = name
+        self.tags = tags
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._queries = None
+        self._start = None
+
+    def start(self):
+        _activate(self)
+        counter = _counter()
+        self._queries = (counter.count, counter.time)
+        self._start = time.time()
+        return self
+
+    def stop(self):
+        if self._start is None:
+            return
+        elapsed = time.time() - self._start
+        self._start = None
+        counter = _counter()
+        queries = counter.count - self._queries[0]
+        query_time = counter.time - self._queries[1]
+        _deactivate(self)
+        self.sink.record(self.name, {
+            'time': round(elapsed * 1000, 3),
+            'queries': queries,
+            'query_time': round(query_time * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }, self.tags)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class NullMeasurement(object):
+    """
+    Measurement used when metrics are disabled
+    """
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+def measure(name, **tags):
+    """
+    Returns a measurement for the given name, a no-op one if metrics are disabled::
+
+        with measure('plugin.BlogTagsPlugin', path=request.path):
+            ...
+    """
+    sink = get_sink()
+    if sink is None:
+        return NullMeasurement()
+    return Measurement(sink, name, **tags)
+
+
+def discard_measurements(**kwargs):
+    """
+    Drops the measurements never stopped in the current thread (e.g.: template
+    responses not rendered) at the end of the request
+    """
+    for measurement in list(_active()):
+        measurement._start = None
+        _deactivate(measurement)
+
+
+request_finished.connect(discard_measurements, dispatch_uid='djangocms_blog_metrics')
+
+
+def record_cache(hit):
+    """
+    Counts a blog cache hit (or miss) in the running measurements
+    """
+    for measurement in _active():
+        if hit:
+            measurement.cache_hits += 1
+        else:
+            measurement.cache_misses += 1
+
+
+def measure_render(render):
+    """
+    Decorator for the blog plugins ``render`` method
+    """
+    @wraps(render)
+    def wrapper(self, context, instance, placeholder):
+        request = context.get('request')
+        with measure('plugin.%s' % self.__class__.__name__, plugin=instance.pk,
+                     placeholder=getattr(placeholder, 'slot', None),
+                     path=getattr(request, 'path', None)):
+            return render(self, context, instance, placeholder)
+    return wrapper
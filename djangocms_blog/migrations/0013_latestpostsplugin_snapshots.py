@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_blog', '0012_auto_20151220_1734'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='latestpostsplugin',
+            name='categories_snapshot',
+            field=models.TextField(verbose_name='categories snapshot', null=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='latestpostsplugin',
+            name='tags_snapshot',
+            field=models.TextField(verbose_name='tags snapshot', null=True, editable=False),
+        ),
+    ]
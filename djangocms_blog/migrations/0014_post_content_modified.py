@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_blog', '0013_latestpostsplugin_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_modified',
+            field=models.DateTimeField(verbose_name='content last modified', null=True, editable=False, blank=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def forwards(apps, schema_editor):
+    Post = apps.get_model('djangocms_blog', 'Post')
+    CMSPlugin = apps.get_model('cms', 'CMSPlugin')
+    changes = CMSPlugin.objects.filter(
+        placeholder_id__in=Post.objects.values('content_id')
+    ).order_by().values_list('placeholder_id').annotate(changed=Max('changed_date'))
+    for placeholder_id, changed in changes:
+        Post.objects.filter(content_id=placeholder_id).update(content_modified=changed)
+
+
+def backwards(apps, schema_editor):
+    # No need for backward data migration
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '__latest__'),
+        ('djangocms_blog', '0014_post_content_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
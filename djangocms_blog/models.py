@@ -5,8 +5,10 @@ from aldryn_apphooks_config.fields import AppHookConfigField
 from aldryn_apphooks_config.managers.parler import AppHookConfigTranslatableManager
 from cms.models import CMSPlugin, PlaceholderField
 from django.conf import settings as dj_settings
+from django.contrib.contenttypes.models import ContentType
 from django.core.urlresolvers import reverse
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.utils import timezone
 from django.utils.encoding import force_text, python_2_unicode_compatible
 from django.utils.html import escape, strip_tags
@@ -16,8 +18,10 @@ from djangocms_text_ckeditor.fields import HTMLField
 from filer.fields.image import FilerImageField
 from meta_mixin.models import ModelMeta
 from parler.models import TranslatableModel, TranslatedFields
+from parler.utils.i18n import get_active_language_choices
 from taggit_autosuggest.managers import TaggableManager
 
+from .cache import bump_generation
 from .cms_appconfig import BlogConfig
 from .managers import GenericDateTaggedManager
 from .settings import get_setting
@@ -52,7 +56,14 @@ class BlogCategory(TranslatableModel):
 
     @property
     def count(self):
-        return self.blog_posts.namespace(self.app_config.namespace).published().count()
+        if not hasattr(self, '_count'):
+            self._count = self.blog_posts.namespace(self.app_config.namespace).published().count()
+        return self._count
+
+    @count.setter
+    def count(self, value):
+        # allows to set the value computed in bulk (see BlogCategoryPlugin)
+        self._count = value
 
     def get_absolute_url(self, lang=None):
         if not lang:
@@ -93,6 +104,8 @@ class Post(ModelMeta, TranslatableModel):
 
     date_created = models.DateTimeField(_('created'), auto_now_add=True)
     date_modified = models.DateTimeField(_('last modified'), auto_now=True)
+    content_modified = models.DateTimeField(_('content last modified'), null=True, blank=True,
+                                            editable=False)
     date_published = models.DateTimeField(_('published since'),
                                           default=timezone.now)
     date_published_end = models.DateTimeField(_('published until'), null=True,
@@ -180,10 +193,28 @@ class Post(ModelMeta, TranslatableModel):
     def __str__(self):
         return self.safe_translation_getter('title')
 
+    @property
+    def last_modified(self):
+        """
+        Date of the latest change of the post or of its content plugins
+        """
+        if self.content_modified and self.content_modified > self.date_modified:
+            return self.content_modified
+        return self.date_modified
+
+    def get_first_category(self):
+        """
+        Returns the first category (by id) of the post, ``None`` if the post has
+        no category; prefetched categories are used if available
+        """
+        if 'categories' in getattr(self, '_prefetched_objects_cache', {}):
+            categories = sorted(self.categories.all(), key=lambda cat: cat.pk)
+            return categories[0] if categories else None
+        return self.categories.order_by('pk').first()
+
     def get_absolute_url(self, lang=None):
         if not lang:
             lang = get_language()
-        category = self.categories.first()
         kwargs = {}
         urlconf = get_setting('PERMALINK_URLS')[self.app_config.url_patterns]
         if '<year>' in urlconf:
@@ -195,7 +226,11 @@ class Post(ModelMeta, TranslatableModel):
         if '<slug>' in urlconf:
             kwargs['slug'] = self.safe_translation_getter('slug', language_code=lang, any_language=True)  # NOQA
         if '<category>' in urlconf:
-            kwargs['category'] = category.safe_translation_getter('slug', language_code=lang, any_language=True)  # NOQA
+            # posts without categories fall back to the slug permalink
+            category = self.get_first_category()
+            category_slug = category and category.safe_translation_getter('slug', language_code=lang, any_language=True)  # NOQA
+            if category_slug:
+                kwargs['category'] = category_slug
         return reverse('%s:post-detail' % self.app_config.namespace, kwargs=kwargs)
 
     def get_meta_attribute(self, param):
@@ -280,10 +315,13 @@ class BasePostPlugin(CMSPlugin):
 
     def post_queryset(self, request=None):
         language = get_language()
-        posts = Post._default_manager
-        if self.app_config:
-            posts = posts.namespace(self.app_config.namespace)
-        posts = posts.active_translations(language_code=language)
+        posts = Post._default_manager.all()
+        if self.app_config_id:
+            posts = posts.filter(app_config_id=self.app_config_id)
+        # translations filtered in a subquery, as joining them requires a DISTINCT
+        posts = posts.filter(pk__in=Post._default_manager.translated(
+            *get_active_language_choices(language)
+        ).values('pk'))
         if not request or not getattr(request, 'toolbar', False) or not request.toolbar.edit_mode:
             posts = posts.published()
         return posts.all()
@@ -301,6 +339,10 @@ class LatestPostsPlugin(BasePostPlugin):
                                         verbose_name=_('filter by category'),
                                         help_text=_('Show only the blog articles tagged '
                                                     u'with chosen categories.'))
+    # comma separated ids of the tags / categories, to filter posts without
+    # loading the plugin relations; None if not computed yet
+    tags_snapshot = models.TextField(_('tags snapshot'), editable=False, null=True)
+    categories_snapshot = models.TextField(_('categories snapshot'), editable=False, null=True)
 
     def __str__(self):
         return force_text(_('%s latest articles by tag') % self.latest_posts)
@@ -308,14 +350,45 @@ class LatestPostsPlugin(BasePostPlugin):
     def copy_relations(self, oldinstance):
         for tag in oldinstance.tags.all():
             self.tags.add(tag)
+        self.categories = oldinstance.categories.all()
+        self.update_snapshot()
 
-    def get_posts(self, request):
+    def update_snapshot(self):
+        """
+        Stores the current tags and categories ids in the snapshot fields.
+
+        Called when the plugin is saved in the admin or copied (e.g.: on page
+        publishing); call it after changing the plugin tags or categories in
+        code.
+        """
+        self.tags_snapshot = ','.join(
+            force_text(pk) for pk in sorted(self.tags.values_list('pk', flat=True))
+        )
+        self.categories_snapshot = ','.join(
+            force_text(pk) for pk in sorted(self.categories.values_list('pk', flat=True))
+        )
+        LatestPostsPlugin.objects.filter(pk=self.pk).update(
+            tags_snapshot=self.tags_snapshot, categories_snapshot=self.categories_snapshot
+        )
+
+    def _snapshot_ids(self, value):
+        return [int(pk) for pk in value.split(',') if pk]
+
+    def get_posts(self, request=None):
+        if self.tags_snapshot is None or self.categories_snapshot is None:
+            self.update_snapshot()
         posts = self.post_queryset(request)
-        if self.tags.exists():
-            posts = posts.filter(tags__in=list(self.tags.all()))
-        if self.categories.exists():
-            posts = posts.filter(categories__in=list(self.categories.all()))
-        return posts.distinct()[:self.latest_posts]
+        tags = self._snapshot_ids(self.tags_snapshot)
+        if tags:
+            posts = posts.filter(pk__in=Post.tags.through.objects.filter(
+                content_type=ContentType.objects.get_for_model(Post), tag_id__in=tags
+            ).values('object_id'))
+        categories = self._snapshot_ids(self.categories_snapshot)
+        if categories:
+            posts = posts.filter(pk__in=Post.categories.through.objects.filter(
+                blogcategory_id__in=categories
+            ).values('post_id'))
+        return posts[:self.latest_posts]
 
 
 @python_2_unicode_compatible
@@ -339,16 +412,25 @@ class AuthorEntriesPlugin(BasePostPlugin):
         posts = self.post_queryset(request)
         return posts[:self.latest_posts]
 
-    def get_authors(self):
-        authors = self.authors.all()
+    def get_authors(self, loader=None):
+        """
+        Returns the authors with their published posts ``count``; counts are
+        taken from the request data loader, if given
+        """
+        authors = list(self.authors.all())
+        if loader is not None:
+            counts = loader.get_author_counts(self.app_config_id)
+        else:
+            posts = Post._default_manager.published()
+            if self.app_config_id:
+                posts = posts.filter(app_config_id=self.app_config_id)
+            counts = dict(posts.filter(
+                author_id__in=[author.pk for author in authors]
+            ).order_by().values('author').annotate(
+                count=models.Count('pk', distinct=True)
+            ).values_list('author', 'count'))
         for author in authors:
-            author.count = 0
-            qs = author.djangocms_blog_post_author
-            if self.app_config:
-                qs = qs.namespace(self.app_config.namespace)
-            count = qs.filter(publish=True).count()
-            if count:
-                author.count = count
+            author.count = counts.get(author.pk, 0)
         return authors
 
 
@@ -360,3 +442,193 @@ class GenericBlogPlugin(BasePostPlugin):
 
     def __str__(self):
         return force_text(_('generic blog plugin'))
+
+
+def _namespace(app_config_id):
+    if app_config_id:
+        return BlogConfig.objects.filter(pk=app_config_id).values_list(
+            'namespace', flat=True
+        ).first()
+
+
+def invalidate_post_cache(sender, instance, **kwargs):
+    bump_generation(_namespace(instance.app_config_id))
+
+
+def invalidate_translation_cache(sender, instance, **kwargs):
+    model = Post if sender is Post._parler_meta.root_model else BlogCategory
+    # the master instance may be already deleted
+    app_config_id = model._default_manager.filter(pk=instance.master_id).values_list(
+        'app_config_id', flat=True
+    ).first()
+    bump_generation(_namespace(app_config_id))
+
+
+def invalidate_post_tags_cache(sender, instance, **kwargs):
+    # taggit (before 0.18) does not send m2m_changed: tagged items are saved /
+    # deleted one by one, for all the tagged models
+    if instance.content_type_id != ContentType.objects.get_for_model(Post).pk:
+        return
+    bump_generation(_namespace(Post._default_manager.filter(pk=instance.object_id).values_list(
+        'app_config_id', flat=True
+    ).first()))
+
+
+def update_post_menu_snapshots(sender, instance, **kwargs):
+    # snapshots import the models
+    from .snapshots import update_posts
+    if sender is Post:
+        update_posts([instance.pk], instance.app_config_id)
+    else:
+        update_posts([instance.master_id])
+
+
+def update_category_menu_snapshots(sender, instance, **kwargs):
+    from .snapshots import update_categories
+    if sender is BlogCategory:
+        update_categories([instance.pk], instance.app_config_id)
+    else:
+        update_categories([instance.master_id])
+
+
+def update_post_relations_menu_snapshots(sender, instance, action, reverse, pk_set, **kwargs):
+    from .snapshots import delete_snapshots, update_posts
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        update_posts([instance.pk], instance.app_config_id)
+    elif pk_set:
+        update_posts(pk_set)
+    else:
+        # cleared relations: the changed posts are unknown
+        delete_snapshots()
+
+
+def delete_config_menu_snapshots(sender, instance, **kwargs):
+    from .snapshots import delete_snapshots
+    delete_snapshots([instance.namespace])
+
+
+def reset_plugin_snapshot(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    plugins = LatestPostsPlugin.objects.all()
+    if not reverse:
+        instance.categories_snapshot = None
+        plugins = plugins.filter(pk=instance.pk)
+    elif pk_set:
+        plugins = plugins.filter(pk__in=pk_set)
+    plugins.update(categories_snapshot=None)
+
+
+def reset_plugin_tagged_snapshot(sender, instance, **kwargs):
+    # as for the posts, taggit sends no m2m_changed for the plugin tags
+    if instance.content_type_id != ContentType.objects.get_for_model(LatestPostsPlugin).pk:
+        return
+    LatestPostsPlugin.objects.filter(pk=instance.object_id).update(tags_snapshot=None)
+
+
+def reset_plugin_categories_snapshot(sender, instance, **kwargs):
+    LatestPostsPlugin.objects.update(categories_snapshot=None)
+
+
+def reset_plugin_tags_snapshot(sender, instance, **kwargs):
+    LatestPostsPlugin.objects.update(tags_snapshot=None)
+
+
+def pregenerate_post_thumbnails(sender, instance, raw=False, **kwargs):
+    if raw or not get_setting('THUMBNAIL_PREGENERATE'):
+        return
+    from .thumbnails import get_post_thumbnails, pregenerate_thumbnails
+    for __ in pregenerate_thumbnails(get_post_thumbnails(instance)):
+        pass
+
+
+def track_plugin_placeholder(sender, instance, raw=False, **kwargs):
+    """
+    Stores the placeholder of the plugin before it's saved, to mark the content
+    of the post it's moved from as modified too
+    """
+    if raw or not isinstance(instance, CMSPlugin) or not instance.pk:
+        return
+    instance._previous_placeholder_id = CMSPlugin.objects.filter(pk=instance.pk).values_list(
+        'placeholder_id', flat=True
+    ).first()
+
+
+def update_content_modified(sender, instance, raw=False, **kwargs):
+    """
+    Marks the content of the posts owning the plugin placeholder (and the one
+    the plugin is moved from) as modified and invalidates the data cached for
+    their namespaces
+    """
+    if raw or not isinstance(instance, CMSPlugin):
+        return
+    placeholder_ids = set([
+        instance.placeholder_id, getattr(instance, '_previous_placeholder_id', None)
+    ])
+    placeholder_ids.discard(None)
+    if not placeholder_ids:
+        return
+    posts = Post._default_manager.filter(content_id__in=placeholder_ids)
+    app_config_ids = set(posts.values_list('app_config_id', flat=True))
+    if not app_config_ids:
+        return
+    posts.update(content_modified=timezone.now())
+    for app_config_id in app_config_ids:
+        bump_generation(_namespace(app_config_id))
+
+
+def invalidate_config_cache(sender, instance, **kwargs):
+    bump_generation(instance.namespace)
+
+
+def invalidate_post_relations_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_generation(_namespace(instance.app_config_id))
+        return
+    posts = Post._default_manager.all()
+    if pk_set:
+        posts = posts.filter(pk__in=pk_set)
+    for app_config_id in posts.order_by().values_list('app_config_id', flat=True).distinct():
+        bump_generation(_namespace(app_config_id))
+
+
+post_save.connect(invalidate_post_cache, sender=Post)
+post_delete.connect(invalidate_post_cache, sender=Post)
+post_save.connect(pregenerate_post_thumbnails, sender=Post)
+# plugins models are subclasses of CMSPlugin: senders are filtered by the receiver
+pre_save.connect(track_plugin_placeholder, dispatch_uid='djangocms_blog_content_modified')
+post_save.connect(update_content_modified, dispatch_uid='djangocms_blog_content_modified')
+post_delete.connect(update_content_modified, dispatch_uid='djangocms_blog_content_modified')
+post_save.connect(invalidate_post_cache, sender=BlogCategory)
+post_delete.connect(invalidate_post_cache, sender=BlogCategory)
+post_save.connect(invalidate_config_cache, sender=BlogConfig)
+post_delete.connect(invalidate_config_cache, sender=BlogConfig)
+post_save.connect(invalidate_translation_cache, sender=Post._parler_meta.root_model)
+post_delete.connect(invalidate_translation_cache, sender=Post._parler_meta.root_model)
+post_save.connect(invalidate_translation_cache, sender=BlogCategory._parler_meta.root_model)
+post_delete.connect(invalidate_translation_cache, sender=BlogCategory._parler_meta.root_model)
+m2m_changed.connect(invalidate_post_relations_cache, sender=Post.categories.through)
+m2m_changed.connect(invalidate_post_relations_cache, sender=Post.sites.through)
+post_save.connect(invalidate_post_tags_cache, sender=Post.tags.through)
+post_delete.connect(invalidate_post_tags_cache, sender=Post.tags.through)
+post_save.connect(update_post_menu_snapshots, sender=Post)
+post_delete.connect(update_post_menu_snapshots, sender=Post)
+post_save.connect(update_post_menu_snapshots, sender=Post._parler_meta.root_model)
+post_delete.connect(update_post_menu_snapshots, sender=Post._parler_meta.root_model)
+post_save.connect(update_category_menu_snapshots, sender=BlogCategory)
+post_delete.connect(update_category_menu_snapshots, sender=BlogCategory)
+post_save.connect(update_category_menu_snapshots, sender=BlogCategory._parler_meta.root_model)
+post_delete.connect(update_category_menu_snapshots, sender=BlogCategory._parler_meta.root_model)
+m2m_changed.connect(update_post_relations_menu_snapshots, sender=Post.categories.through)
+m2m_changed.connect(update_post_relations_menu_snapshots, sender=Post.sites.through)
+post_save.connect(delete_config_menu_snapshots, sender=BlogConfig)
+post_delete.connect(delete_config_menu_snapshots, sender=BlogConfig)
+m2m_changed.connect(reset_plugin_snapshot, sender=LatestPostsPlugin.categories.through)
+post_save.connect(reset_plugin_tagged_snapshot, sender=LatestPostsPlugin.tags.through)
+post_delete.connect(reset_plugin_tagged_snapshot, sender=LatestPostsPlugin.tags.through)
+post_delete.connect(reset_plugin_categories_snapshot, sender=BlogCategory)
+post_delete.connect(reset_plugin_tags_snapshot, sender=Post.tags.through.tag_model())
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+from django.core.urlresolvers import NoReverseMatch, reverse
+from django.utils.encoding import force_text
+from django.utils.http import urlquote
+from django.utils.regex_helper import normalize
+from django.utils.translation import get_language, override
+
+from .settings import get_setting
+
+# same characters left unquoted by django reverse
+SAFE_CHARACTERS = "!$&'()*+,;=/~:@"
+CATEGORY_PLACEHOLDER = '__category__'
+
+
+class PermalinkBuilder(object):
+    """
+    Builds posts and categories URLs without resolving each of them: the
+    apphook root URL is reversed once per namespace and language, the rest of
+    the URL is built from the configured permalink patterns.
+
+    URLs are the ones returned by ``Post.get_absolute_url`` and
+    ``BlogCategory.get_absolute_url``; the instance is meant to be short
+    lived (e.g.: the time to build a menu), as the apphook URLs may change.
+    """
+
+    def __init__(self):
+        self._prefixes = {}
+        self._patterns = {}
+        self._category_urls = {}
+
+    def get_prefix(self, namespace, language=None):
+        """
+        Returns the URL of the apphook root for the namespace
+        """
+        key = (namespace, language or get_language())
+        if key not in self._prefixes:
+            with override(key[1]):
+                self._prefixes[key] = reverse(
+                    '%s:posts-latest' % namespace, current_app=namespace
+                )
+        return self._prefixes[key]
+
+    def get_category_url(self, namespace, language=None):
+        """
+        Returns the URL of the categories view for the namespace, with a
+        placeholder in place of the category slug
+        """
+        key = (namespace, language or get_language())
+        if key not in self._category_urls:
+            with override(key[1]):
+                self._category_urls[key] = reverse(
+                    '%s:posts-category' % namespace, kwargs={'category': CATEGORY_PLACEHOLDER},
+                    current_app=namespace
+                )
+        return self._category_urls[key]
+
+    def get_pattern(self, url_patterns):
+        """
+        Returns the format string and the parameters of the detail URL for
+        the given permalink style
+        """
+        if url_patterns not in self._patterns:
+            self._patterns[url_patterns] = normalize(
+                get_setting('PERMALINK_URLS')[url_patterns]
+            )[0]
+        return self._patterns[url_patterns]
+
+    def get_slug_pattern(self):
+        """
+        Returns the format string and the parameters of the detail URL with
+        the post slug only, the one reversed by ``Post.get_absolute_url`` for
+        posts without a category
+        """
+        for url_patterns in sorted(get_setting('PERMALINK_URLS')):
+            path, params = self.get_pattern(url_patterns)
+            if list(params) == ['slug']:
+                return path, params
+        raise NoReverseMatch('No post permalink with the slug only')
+
+    def build(self, namespace, path, params, language=None):
+        return self.get_prefix(namespace, language) + urlquote(
+            path % dict((key, force_text(value)) for key, value in params.items()),
+            safe=SAFE_CHARACTERS
+        )
+
+    def url(self, config, language, date_published, slug, category_slug=None):
+        """
+        Returns the URL of a post from its values: ``category_slug`` is the
+        slug of the first post category (by id), needed only by the
+        ``category`` permalink style: without it, the slug permalink is used.
+        """
+        path, params = self.get_pattern(config.url_patterns)
+        if 'category' in params and not category_slug:
+            path, params = self.get_slug_pattern()
+        values = {}
+        if 'year' in params:
+            values['year'] = date_published.year
+        if 'month' in params:
+            values['month'] = '%02d' % date_published.month
+        if 'day' in params:
+            values['day'] = '%02d' % date_published.day
+        if 'slug' in params:
+            values['slug'] = slug
+        if 'category' in params:
+            values['category'] = category_slug
+        return self.build(config.namespace, path, values, language)
+
+    def post_url(self, post, config, language, category=None):
+        """
+        Returns the URL of the post in the given language; ``category`` is the
+        first post category (by id), needed only by the ``category`` permalink
+        style.
+
+        Post translations should be prefetched, as well as category ones.
+        """
+        return self.url(
+            config, language, post.date_published,
+            post.safe_translation_getter('slug', language_code=language, any_language=True),
+            category.safe_translation_getter(
+                'slug', language_code=language, any_language=True
+            ) if category else None
+        )
+
+    def category_url(self, category, config, language):
+        """
+        Returns the URL of the category in the given language (the posts list
+        if the category is not translated)
+        """
+        if language in category.get_available_languages():
+            return self.get_category_url(config.namespace, language).replace(
+                CATEGORY_PLACEHOLDER, urlquote(
+                    category.safe_translation_getter('slug', language_code=language),
+                    safe=SAFE_CHARACTERS
+                )
+            )
+        return self.get_prefix(config.namespace, language)
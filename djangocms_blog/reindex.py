@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import json
+import os
+import tempfile
+from multiprocessing import Pool
+
+from django.db import connections
+from haystack import connections as haystack_connections
+from haystack.exceptions import NotHandled
+
+from .models import Post
+
+
+def get_post_index(using):
+    """
+    Returns the posts search index of the haystack connection, ``None`` if the
+    connection does not index the posts
+    """
+    try:
+        return haystack_connections[using].get_unified_index().get_index(Post)
+    except NotHandled:
+        return None
+
+
+def load_state(path):
+    """
+    Returns the last committed post id by haystack connection
+    """
+    if not path:
+        return {}
+    try:
+        with open(path) as state_file:
+            return json.load(state_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_state(path, state):
+    if not path:
+        return
+    directory, name = os.path.split(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % name)
+    with os.fdopen(handle, 'w') as state_file:
+        json.dump(state, state_file, sort_keys=True)
+    os.rename(temp_path, path)
+
+
+def get_chunks(using, batch_size, after=None):
+    """
+    Returns the (first id, last id) ranges of ``batch_size`` posts of the
+    connection index queryset, with id greater than ``after`` if given
+    """
+    queryset = get_post_index(using).index_queryset(using=using)
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    pks = sorted(set(queryset.values_list('pk', flat=True)))
+    return [
+        (pks[start], pks[min(start + batch_size, len(pks)) - 1])
+        for start in range(0, len(pks), batch_size)
+    ]
+
+
+def update_chunk(using, first, last):
+    """
+    Prepares the posts of the connection index queryset in the given id range
+    and sends them to the search backend; returns the number of posts
+    """
+    index = get_post_index(using)
+    posts = list(index.index_queryset(using=using).filter(
+        pk__gte=first, pk__lte=last
+    ).order_by('pk'))
+    if posts:
+        haystack_connections[using].get_backend().update(index, posts)
+    return len(set(post.pk for post in posts))
+
+
+def _update_chunk_task(task):
+    using, first, last = task
+    return using, first, last, update_chunk(using, first, last)
+
+
+def reindex_posts(aliases, batch_size, workers=1, state_path=None):
+    """
+    Updates the posts in the search index of the given haystack connections
+    (one per language, with aldryn-search) in chunks of ``batch_size`` posts
+    by id, using a pool of ``workers`` processes if more than one.
+
+    The id of the last post sent to each connection is stored in the
+    ``state_path`` file, if given, after each chunk: a later run resumes after
+    it, until the connection is completely updated.
+
+    Yields a (connection alias, first id, last id, posts count) tuple for each
+    chunk, in id order.
+    """
+    state = load_state(state_path)
+    tasks = []
+    for using in aliases:
+        tasks.extend(
+            (using, first, last) for first, last in get_chunks(using, batch_size, state.get(using))
+        )
+    pool = None
+    if workers > 1:
+        # forked processes must not share the parent database connections
+        for connection in connections.all():
+            connection.close()
+        pool = Pool(workers)
+        # results are ordered, thus the stored ids are never ahead of a missing chunk
+        results = pool.imap(_update_chunk_task, tasks)
+    else:
+        results = (_update_chunk_task(task) for task in tasks)
+    try:
+        for result in results:
+            state[result[0]] = result[2]
+            save_state(state_path, state)
+            yield result
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    for using in aliases:
+        state.pop(using, None)
+    save_state(state_path, state)
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+from django.template import Template
+
+# renders the ``content`` placeholder of the ``post`` context variable
+CONTENT_TEMPLATE = Template('{% load cms_tags %}{% render_placeholder post.content %}')
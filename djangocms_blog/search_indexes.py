@@ -1,13 +1,50 @@
 # -*- coding: utf-8 -*-
 from aldryn_search.helpers import get_plugin_index_data
 from aldryn_search.utils import get_index_base, strip_tags
+from cms.models import CMSPlugin
+from cms.utils.plugins import downcast_plugins
 from django.utils.encoding import force_text
 from haystack import indexes
 
+from .managers import GenericDateQuerySet
 from .models import Post
 from .settings import get_setting
 
 
+def load_search_data(posts, language=None):
+    """
+    Loads the content plugins of the given posts in the language (each post
+    current language by default), downcast with a query per plugin type, and
+    stores them in the posts ``_search_plugins`` dictionary (by language)
+    """
+    posts = [(post, language or post.get_current_language()) for post in posts]
+    plugins = {}
+    placeholder_ids = set(post.content_id for post, __ in posts if post.content_id)
+    if placeholder_ids:
+        for plugin in downcast_plugins(list(CMSPlugin.objects.filter(
+            placeholder_id__in=placeholder_ids,
+            language__in=set(post_language for __, post_language in posts)
+        ))):
+            plugins.setdefault((plugin.placeholder_id, plugin.language), []).append(plugin)
+    for post, post_language in posts:
+        if not hasattr(post, '_search_plugins'):
+            post._search_plugins = {}
+        post._search_plugins[post_language] = plugins.get((post.content_id, post_language), [])
+
+
+class PostIndexQuerySet(GenericDateQuerySet):
+    """
+    Posts queryset loading the posts content plugins each time it's evaluated:
+    as haystack evaluates a slice of the index queryset per batch, plugins are
+    loaded in bulk for each batch (see ``load_search_data``)
+    """
+
+    def iterator(self):
+        posts = list(super(PostIndexQuerySet, self).iterator())
+        load_search_data([post for post in posts if isinstance(post, Post)])
+        return iter(posts)
+
+
 class PostIndex(get_index_base()):
     haystack_use_for_indexing = get_setting('ENABLE_SEARCH')
 
@@ -40,12 +77,24 @@ class PostIndex(get_index_base()):
         return qs
 
     def get_index_queryset(self, language):
-        return self.get_model().objects.published().active_translations(
-            language_code=language)
+        return PostIndexQuerySet(self.get_model()).published().active_translations(
+            language_code=language
+        ).language(language).select_related('app_config', 'author', 'content').prefetch_related(
+            'translations', 'categories', 'categories__translations', 'tags'
+        )
 
     def get_model(self):
         return Post
 
+    def get_plugins(self, post, language):
+        """
+        Returns the post content plugins in the language, loading them if the
+        post does not come from the index queryset
+        """
+        if language not in getattr(post, '_search_plugins', {}):
+            load_search_data([post], language)
+        return post._search_plugins[language]
+
     def get_search_data(self, post, language, request):
         optional_attributes = []
         abstract = post.safe_translation_getter('abstract')
@@ -58,11 +107,9 @@ class PostIndex(get_index_base()):
                 force_text(category.safe_translation_getter('name')))
         for tag in post.tags.all():
             text_bits.append(force_text(tag.name))
-        if post.content:
-            plugins = post.content.cmsplugin_set.filter(language=language)
-            for base_plugin in plugins:
-                content = get_plugin_index_data(base_plugin, request)
-                text_bits.append(' '.join(content))
+        for base_plugin in self.get_plugins(post, language):
+            content = get_plugin_index_data(base_plugin, request)
+            text_bits.append(' '.join(content))
         for attribute in optional_attributes:
             value = force_text(getattr(post, attribute))
             if value and value not in text_bits:
@@ -58,6 +58,10 @@ def get_setting(name):
             settings, 'BLOG_POSTS_LIST_TRUNCWORDS_COUNT', 100
         ),
         'BLOG_MENU_TYPES': MENU_TYPES,
+        'BLOG_MENU_POSTS_LIMIT': getattr(settings, 'BLOG_MENU_POSTS_LIMIT', None),
+        'BLOG_MENU_SELECTED_CATEGORY_ONLY': getattr(
+            settings, 'BLOG_MENU_SELECTED_CATEGORY_ONLY', False),
+        'BLOG_MENU_SNAPSHOT_DURATION': getattr(settings, 'BLOG_MENU_SNAPSHOT_DURATION', None),
         'BLOG_TYPE': getattr(settings, 'BLOG_TYPE', 'Article'),
         'BLOG_TYPES': meta_settings.OBJECT_TYPES,
         'BLOG_FB_TYPE': getattr(settings, 'BLOG_FB_TYPE', 'Article'),
@@ -102,23 +106,52 @@ def get_setting(name):
             settings, 'BLOG_SITEMAP_CHANGEFREQ_DEFAULT', 'monthly'
         ),
 
+        'BLOG_SITEMAP_DIRECTORY': getattr(settings, 'BLOG_SITEMAP_DIRECTORY', None),
+        'BLOG_SITEMAP_URL': getattr(settings, 'BLOG_SITEMAP_URL', None),
+        'BLOG_SITEMAP_WORKERS': getattr(settings, 'BLOG_SITEMAP_WORKERS', 1),
+
         'BLOG_ENABLE_SEARCH': getattr(settings, 'BLOG_ENABLE_SEARCH', True),
+        'BLOG_SEARCH_BATCH_SIZE': getattr(settings, 'BLOG_SEARCH_BATCH_SIZE', 500),
+        'BLOG_SEARCH_WORKERS': getattr(settings, 'BLOG_SEARCH_WORKERS', 1),
+        'BLOG_SEARCH_STATE_FILE': getattr(settings, 'BLOG_SEARCH_STATE_FILE', None),
+        'BLOG_ENABLE_API': getattr(settings, 'BLOG_ENABLE_API', True),
+        'BLOG_EXPORT_CHUNK_SIZE': getattr(settings, 'BLOG_EXPORT_CHUNK_SIZE', 500),
+        'BLOG_ITEM_CACHE_DURATION': getattr(settings, 'BLOG_ITEM_CACHE_DURATION', 3600),
+        'BLOG_PLUGIN_CACHE_DURATION': getattr(settings, 'BLOG_PLUGIN_CACHE_DURATION', 86400),
         'BLOG_CURRENT_POST_IDENTIFIER': getattr(
             settings, 'BLOG_CURRENT_POST_IDENTIFIER', 'djangocms_post_current'),
         'BLOG_CURRENT_NAMESPACE': getattr(
             settings, 'BLOG_CURRENT_NAMESPACE', 'djangocms_post_current_config'),
+        'BLOG_CURRENT_LOADER': getattr(
+            settings, 'BLOG_CURRENT_LOADER', 'djangocms_post_current_loader'),
+        'BLOG_FEED_LATEST_ITEMS': getattr(settings, 'BLOG_FEED_LATEST_ITEMS', 10),
+        'BLOG_FEED_CACHE_DURATION': getattr(settings, 'BLOG_FEED_CACHE_DURATION', 86400),
+        'BLOG_THUMBNAIL_PREGENERATE': getattr(settings, 'BLOG_THUMBNAIL_PREGENERATE', False),
+        'BLOG_THUMBNAIL_WORKERS': getattr(settings, 'BLOG_THUMBNAIL_WORKERS', 1),
+        'BLOG_THUMBNAIL_CACHE_DURATION': getattr(
+            settings, 'BLOG_THUMBNAIL_CACHE_DURATION', 86400 * 30),
+        'BLOG_METRICS_SINK': getattr(settings, 'BLOG_METRICS_SINK', None),
+        'BLOG_METRICS_STATSD_HOST': getattr(settings, 'BLOG_METRICS_STATSD_HOST', 'localhost'),
+        'BLOG_METRICS_STATSD_PORT': getattr(settings, 'BLOG_METRICS_STATSD_PORT', 8125),
+        'BLOG_METRICS_STATSD_PREFIX': getattr(
+            settings, 'BLOG_METRICS_STATSD_PREFIX', 'djangocms_blog'),
+        'BLOG_METRICS_STATSD_TAGS': getattr(settings, 'BLOG_METRICS_STATSD_TAGS', True),
         'BLOG_ENABLE_THROUGH_TOOLBAR_MENU': getattr(
             settings, 'BLOG_ENABLE_THROUGH_TOOLBAR_MENU', False),
 
         'BLOG_PLUGIN_MODULE_NAME': getattr(settings, 'BLOG_PLUGIN_MODULE_NAME', _('Blog')),
         'BLOG_LATEST_ENTRIES_PLUGIN_NAME': getattr(
             settings, 'BLOG_LATEST_ENTRIES_PLUGIN_NAME', _('Latest Blog Articles')),
+        'BLOG_LATEST_ENTRIES_PLUGIN_NAME_CACHED': getattr(
+            settings, 'BLOG_LATEST_ENTRIES_PLUGIN_NAME_CACHED', _('Latest Blog Articles - Cache')),
         'BLOG_AUTHOR_POSTS_PLUGIN_NAME': getattr(
             settings, 'BLOG_AUTHOR_POSTS_PLUGIN_NAME', _('Author Blog Articles')),
         'BLOG_TAGS_PLUGIN_NAME': getattr(
             settings, 'BLOG_TAGS_PLUGIN_NAME', _('Tags')),
         'BLOG_CATEGORY_PLUGIN_NAME': getattr(
             settings, 'BLOG_CATEGORY_PLUGIN_NAME', _('Categories')),
+        'BLOG_CATEGORY_PLUGIN_HIDE_EMPTY': getattr(
+            settings, 'BLOG_CATEGORY_PLUGIN_HIDE_EMPTY', False),
         'BLOG_ARCHIVE_PLUGIN_NAME': getattr(
             settings, 'BLOG_ARCHIVE_PLUGIN_NAME', _('Archive')),
 
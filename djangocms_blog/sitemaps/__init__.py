@@ -2,34 +2,218 @@
 from __future__ import absolute_import, print_function, unicode_literals
 
 from cms.utils import get_language_list
-from django.contrib.sitemaps import Sitemap
-from parler.utils.context import smart_override
+from django.contrib.sitemaps import Sitemap, views
+from django.core.paginator import Paginator
+from django.db.models import Min
+from parler.utils.i18n import get_active_language_choices
 
-from ..models import Post
+from ..cms_appconfig import BlogConfig
+from ..models import BlogCategory, Post
+from ..permalinks import PermalinkBuilder
 from ..settings import get_setting
 
+try:
+    from collections import OrderedDict
+except ImportError:  # python 2.6 (django 1.6)
+    from django.utils.datastructures import SortedDict as OrderedDict
+
+
+def get_translated_slug(slugs, language):
+    """
+    Returns the slug in the given language from the {language: slug}
+    dictionary, falling back to the parler fallback languages and then to
+    any language
+    """
+    for choice in get_active_language_choices(language):
+        if choice in slugs:
+            return slugs[choice]
+    return next(iter(sorted(slugs.values())), None)
+
+
+class SitemapPaginator(Paginator):
+    """
+    Paginator loading each page items with a single query and passing them
+    to ``prepare`` before returning the page
+    """
+
+    def __init__(self, object_list, per_page, prepare):
+        super(SitemapPaginator, self).__init__(object_list, per_page)
+        self.prepare = prepare
+
+    def page(self, number):
+        page = super(SitemapPaginator, self).page(number)
+        page.object_list = self.prepare(list(page.object_list.iterator()))
+        return page
+
 
 class BlogSitemap(Sitemap):
+    """
+    Sitemap of the published posts translations, optionally restricted to
+    a namespace and / or a language (see ``get_sitemaps``).
+
+    Items are dictionaries with the values of the post translations: they
+    are loaded one page (``limit`` items) at a time and their locations are
+    computed in bulk, along with the locations of the other translations
+    (``hreflang`` alternates, rendered by the ``djangocms_blog/sitemap.xml``
+    template).
+    """
+
+    def __init__(self, namespace=None, language=None):
+        self.namespace = namespace
+        self.language = language
+        self._configs = None
+
+    def get_configs(self):
+        if self._configs is None:
+            self._configs = dict((config.pk, config) for config in BlogConfig.objects.all())
+        return self._configs
+
+    def get_config(self, obj):
+        if obj:
+            return self.get_configs().get(obj['master__app_config_id'])
 
     def priority(self, obj):
-        if obj and obj.app_config:
-            return obj.app_config.sitemap_priority
+        config = self.get_config(obj)
+        if config:
+            return config.sitemap_priority
         return get_setting('SITEMAP_PRIORITY_DEFAULT')
 
     def changefreq(self, obj):
-        if obj and obj.app_config:
-            return obj.app_config.sitemap_changefreq
+        config = self.get_config(obj)
+        if config:
+            return config.sitemap_changefreq
         return get_setting('SITEMAP_CHANGEFREQ_DEFAULT')
 
     def location(self, obj):
-        with smart_override(obj.get_current_language()):
-            return obj.get_absolute_url(obj.get_current_language())
+        return obj['location']
+
+    def lastmod(self, obj):
+        # same as Post.last_modified
+        return max(filter(None, (obj['master__date_modified'], obj['master__content_modified'])))
 
     def items(self):
-        items = []
-        for lang in get_language_list():
-            items.extend(Post.objects.translated(lang).language(lang).published())
+        posts = Post.objects.all()
+        if self.namespace:
+            posts = Post.objects.namespace(self.namespace)
+        posts = posts.published()
+        languages = [self.language] if self.language else get_language_list()
+        return Post._parler_meta.root_model.objects.filter(
+            master_id__in=posts.values('pk'), language_code__in=languages
+        ).order_by('master_id', 'language_code').values(
+            'master_id', 'language_code', 'slug', 'master__app_config_id',
+            'master__date_published', 'master__date_modified', 'master__content_modified',
+        )
+
+    @property
+    def paginator(self):
+        return SitemapPaginator(self.items(), self.limit, self.prepare_items)
+
+    def get_urls(self, page=1, site=None, protocol=None):
+        """
+        Adds the absolute URLs of the items ``alternates``
+        """
+        urls = super(BlogSitemap, self).get_urls(page, site, protocol)
+        for url in urls:
+            base = url['location'][:-len(url['item']['location'])]
+            url['alternates'] = [
+                (language, base + location) for language, location in url['item']['alternates']
+            ]
+        return urls
+
+    def get_category_slugs(self, post_ids):
+        """
+        Returns the slugs of the first category (by id) of the given posts,
+        as a dictionary {post id: {language: slug}}
+        """
+        first_categories = dict(Post.categories.through.objects.filter(
+            post_id__in=post_ids
+        ).order_by().values('post_id').annotate(
+            category_id=Min('blogcategory_id')
+        ).values_list('post_id', 'category_id'))
+        slugs = {}
+        for category_id, language, slug in BlogCategory._parler_meta.root_model.objects.filter(
+            master_id__in=set(first_categories.values())
+        ).values_list('master_id', 'language_code', 'slug'):
+            slugs.setdefault(category_id, {})[language] = slug
+        return dict(
+            (post_id, slugs.get(category_id, {}))
+            for post_id, category_id in first_categories.items()
+        )
+
+    def get_post_slugs(self, post_ids):
+        """
+        Returns the slugs of the given posts in the sitemap languages, as a
+        dictionary {post id: {language: slug}}
+        """
+        slugs = {}
+        for post_id, language, slug in Post._parler_meta.root_model.objects.filter(
+            master_id__in=post_ids, language_code__in=get_language_list()
+        ).values_list('master_id', 'language_code', 'slug'):
+            slugs.setdefault(post_id, {})[language] = slug
+        return slugs
+
+    def prepare_items(self, items):
+        """
+        Adds the ``location`` and the ``alternates`` (a (language, location)
+        couple for each post translation, if more than one) to the loaded
+        items; the URLs of all the translations are computed with two queries
+        (three for the ``category`` permalink style) per page.
+        """
+        configs = self.get_configs()
+        builder = PermalinkBuilder()
+        post_ids = set(item['master_id'] for item in items)
+        post_slugs = self.get_post_slugs(post_ids)
+        category_slugs = {}
+        category_posts = [
+            item['master_id'] for item in items
+            if 'category' in builder.get_pattern(
+                configs[item['master__app_config_id']].url_patterns
+            )[1]
+        ]
+        if category_posts:
+            category_slugs = self.get_category_slugs(category_posts)
+        locations = {}
+        for item in items:
+            post_id = item['master_id']
+            if post_id not in locations:
+                locations[post_id] = dict(
+                    (language, builder.url(
+                        configs[item['master__app_config_id']], language,
+                        item['master__date_published'], slug,
+                        get_translated_slug(category_slugs.get(post_id, {}), language)
+                    )) for language, slug in post_slugs.get(post_id, {}).items()
+                )
+            item['location'] = locations[post_id][item['language_code']]
+            item['alternates'] = sorted(locations[post_id].items())
+            if len(item['alternates']) < 2:
+                item['alternates'] = []
         return items
 
-    def lastmod(self, obj):
-        return obj.date_modified
+
+def get_sitemaps(sitemap_class=BlogSitemap):
+    """
+    Returns a sitemap for each blog namespace and language, by section name
+    """
+    sitemaps = OrderedDict()
+    for namespace in BlogConfig.objects.order_by('namespace').values_list(
+        'namespace', flat=True
+    ):
+        for language in get_language_list():
+            sitemaps['blog-%s-%s' % (namespace, language)] = sitemap_class(namespace, language)
+    return sitemaps
+
+
+def index(request, sitemap_url_name='djangocms_blog_sitemap', **kwargs):
+    """
+    Sitemaps index of the blog namespaces and languages
+    """
+    return views.index(request, get_sitemaps(), sitemap_url_name=sitemap_url_name, **kwargs)
+
+
+def sitemap(request, section=None, template_name='djangocms_blog/sitemap.xml', **kwargs):
+    """
+    Sitemap of a blog namespace and language
+    """
+    return views.sitemap(
+        request, get_sitemaps(), section=section, template_name=template_name, **kwargs
+    )
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import hashlib
+import json
+import os
+import tempfile
+from multiprocessing import Pool
+
+from django.contrib.sites.models import Site
+from django.db import connections
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.text import compress_string
+
+from . import get_sitemaps
+
+STATE_FILE = 'sitemap-state.json'
+INDEX_FILE = 'sitemap.xml.gz'
+SHARD_FILE = 'sitemap-%s-%d.xml.gz'
+GENERATED = 'generated'
+SKIPPED = 'skipped'
+REMOVED = 'removed'
+
+
+def write_file(path, content):
+    """
+    Writes the gzip compressed content to the given path, atomically
+    replacing the existing file
+    """
+    directory, name = os.path.split(path)
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % name)
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            temp_file.write(compress_string(force_bytes(content)))
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def load_state(directory):
+    try:
+        with open(os.path.join(directory, STATE_FILE)) as state_file:
+            return json.load(state_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_state(directory, state):
+    path = os.path.join(directory, STATE_FILE)
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % STATE_FILE)
+    with os.fdopen(handle, 'w') as state_file:
+        json.dump(state, state_file, sort_keys=True)
+    os.rename(temp_path, path)
+
+
+def get_fingerprints(sitemap):
+    """
+    Returns the fingerprint of each page of the sitemap, computed from the
+    ids, languages and modification dates of its items
+    """
+    fingerprints = []
+    fingerprint = None
+    for index, row in enumerate(sitemap.items().values_list(
+        'master_id', 'language_code', 'master__date_modified', 'master__content_modified'
+    ).iterator()):
+        if index % sitemap.limit == 0:
+            if fingerprint:
+                fingerprints.append(fingerprint.hexdigest())
+            fingerprint = hashlib.md5()
+        fingerprint.update(force_bytes(repr(row)))
+    if fingerprint:
+        fingerprints.append(fingerprint.hexdigest())
+    return fingerprints
+
+
+def generate_section(directory, section, domain, protocol, state, force=False):
+    """
+    Writes the sitemap files of the section whose fingerprint changed since
+    the last run (all if ``force``)
+
+    Returns the section shards fingerprints (by file name) and a
+    (file name, result) couple for each shard.
+    """
+    sitemap = get_sitemaps()[section]
+    site = Site(domain=domain, name=domain)
+    shards = {}
+    results = []
+    for page, fingerprint in enumerate(get_fingerprints(sitemap), 1):
+        name = SHARD_FILE % (section, page)
+        shards[name] = fingerprint
+        path = os.path.join(directory, name)
+        if not force and state.get(name) == fingerprint and os.path.exists(path):
+            results.append((name, SKIPPED))
+            continue
+        urls = sitemap.get_urls(page=page, site=site, protocol=protocol)
+        write_file(path, loader.render_to_string('djangocms_blog/sitemap.xml', {'urlset': urls}))
+        results.append((name, GENERATED))
+    return shards, results
+
+
+def _generate_section_task(task):
+    return generate_section(*task)
+
+
+def generate_sitemaps(directory, base_url, domain, protocol='http', workers=1, force=False):
+    """
+    Writes the sitemap index and the sitemaps of the blog namespaces and
+    languages as gzip compressed files in the directory; ``base_url`` is the
+    URL the directory is served from.
+
+    Only the sitemaps pages whose posts changed since the last run are
+    written, unless ``force`` is set; sections are processed by a pool of
+    ``workers`` processes if more than one.
+
+    Yields a (file name, result) couple for each sitemap file.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    state = load_state(directory)
+    tasks = [
+        (directory, section, domain, protocol, state, force) for section in get_sitemaps()
+    ]
+    if workers > 1:
+        # forked processes must not share the parent database connections
+        for connection in connections.all():
+            connection.close()
+        pool = Pool(workers)
+        try:
+            sections = list(pool.imap_unordered(_generate_section_task, tasks))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        sections = [generate_section(*task) for task in tasks]
+    shards = {}
+    for section_shards, results in sections:
+        shards.update(section_shards)
+        for result in results:
+            yield result
+    write_file(os.path.join(directory, INDEX_FILE), loader.render_to_string(
+        'sitemap_index.xml', {'sitemaps': [base_url + name for name in sorted(shards)]}
+    ))
+    for name in sorted(set(state) - set(shards)):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+        yield name, REMOVED
+    save_state(directory, shards)
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import hashlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.encoding import force_bytes
+from django.utils.timezone import now
+from django.utils.translation import override
+from parler.utils.context import switch_language
+from parler.utils.i18n import get_active_language_choices
+
+from .cache import _new_generation
+from .cms_appconfig import BlogConfig
+from .models import BlogCategory, Post
+from .permalinks import PermalinkBuilder
+from .settings import MENU_TYPE_CATEGORIES, MENU_TYPE_COMPLETE, MENU_TYPE_POSTS, get_setting
+
+SNAPSHOT_KEY = 'djangocms_blog:menu_snapshot:%s:%s'
+VERSION_KEY = 'djangocms_blog:menu_snapshot_version:%s:%s'
+
+# snapshot entries fields
+CATEGORY_ID, CATEGORY_PARENT, CATEGORY_TITLE, CATEGORY_URL = range(4)
+(POST_ID, POST_CATEGORY, POST_TITLE, POST_URL, POST_PUBLISHED, POST_PUBLISHED_END,
+ POST_CREATED, POST_SITES) = range(8)
+
+
+def get_snapshot_key(namespace, language):
+    return SNAPSHOT_KEY % (hashlib.md5(force_bytes(namespace)).hexdigest(), language)
+
+
+def get_version_key(namespace, language):
+    """
+    The version counter is incremented on each change: a stored snapshot is
+    current only if it carries the current version
+    """
+    return VERSION_KEY % (hashlib.md5(force_bytes(namespace)).hexdigest(), language)
+
+
+def _sort_categories(entries):
+    return sorted(entries, key=lambda entry: (
+        entry[CATEGORY_PARENT] is not None, entry[CATEGORY_PARENT], entry[CATEGORY_TITLE]
+    ))
+
+
+def _sort_posts(entries):
+    # same as Post ordering
+    return sorted(entries, key=lambda entry: (
+        entry[POST_PUBLISHED], entry[POST_CREATED]
+    ), reverse=True)
+
+
+def _limit_posts(entries, config):
+    """
+    Returns the posts entries which may be shown in the menu of at least one
+    site, according to the configuration posts limit (see
+    ``BlogCategoryMenu.get_nodes``), and whether any entry has been dropped.
+
+    Scheduled and expiring posts are always kept, as they replace the other
+    posts in the menu when they go live / expire.
+    """
+    limit = config.menu_posts_limit
+    if not limit:
+        return entries, False
+    current = now()
+    site_ids = list(Site.objects.values_list('pk', flat=True))
+    categories_menu = config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_CATEGORIES)
+    counts = defaultdict(int)
+    posts = []
+    for entry in entries:
+        if entry[POST_PUBLISHED] > current or entry[POST_PUBLISHED_END]:
+            posts.append(entry)
+            continue
+        group = entry[POST_CATEGORY] if categories_menu else None
+        sites = entry[POST_SITES] or site_ids
+        if all(counts[group, site_id] >= limit for site_id in sites):
+            continue
+        for site_id in sites:
+            counts[group, site_id] += 1
+        posts.append(entry)
+    return posts, len(posts) < len(entries)
+
+
+def category_entry(category, config, language, builder):
+    return (
+        category.pk, category.parent_id,
+        category.safe_translation_getter('name', language_code=language, default=''),
+        builder.category_url(category, config, language),
+    )
+
+
+def post_entry(post, config, language, builder, category_id, category=None, sites=()):
+    with switch_language(post, language):
+        title = post.get_title()
+    return (
+        post.pk, category_id, title, builder.post_url(post, config, language, category),
+        post.date_published, post.date_published_end, post.date_created, tuple(sites),
+    )
+
+
+def _needs_category(config, builder):
+    return 'category' in builder.get_pattern(config.url_patterns)[1]
+
+
+def _load_categories(config, language, **filters):
+    """
+    Returns the translated categories of the configuration by id
+    """
+    return dict(
+        (category.pk, category) for category in BlogCategory._default_manager.filter(
+            app_config=config, pk__in=BlogCategory._default_manager.translated(
+                *get_active_language_choices(language)
+            ).values('pk')
+        ).filter(**filters).prefetch_related('translations')
+    )
+
+
+def _post_entries(config, language, builder, categories, **filters):
+    """
+    Returns the entries of the configuration posts which are published (or
+    scheduled) and translated; ``categories`` are the already loaded ones by id
+    """
+    posts = Post._default_manager.filter(
+        Q(date_published_end__isnull=True) | Q(date_published_end__gte=now()),
+        app_config=config, publish=True, pk__in=Post._default_manager.translated(
+            *get_active_language_choices(language)
+        ).values('pk')
+    ).filter(**filters)
+    first_categories = {}
+    for post_id, category_id in Post.categories.through.objects.filter(
+        post_id__in=posts.values('pk')
+    ).order_by('blogcategory_id').values_list('post_id', 'blogcategory_id'):
+        first_categories.setdefault(post_id, category_id)
+    post_sites = defaultdict(list)
+    for post_id, site_id in Post.sites.through.objects.filter(
+        post_id__in=posts.values('pk')
+    ).order_by('site_id').values_list('post_id', 'site_id'):
+        post_sites[post_id].append(site_id)
+    missing = set(first_categories.values()) - set(categories)
+    if missing and _needs_category(config, builder):
+        categories = dict(categories)
+        categories.update(
+            (category.pk, category) for category in BlogCategory._default_manager.filter(
+                pk__in=missing
+            ).prefetch_related('translations')
+        )
+    return [
+        post_entry(
+            post, config, language, builder, first_categories.get(post.pk),
+            categories.get(first_categories.get(post.pk)), post_sites[post.pk]
+        ) for post in posts.prefetch_related('translations')
+    ]
+
+
+def build_snapshot(config, language):
+    """
+    Returns the menu snapshot of the namespace for the language: a dictionary
+    with the ``categories`` and ``posts`` entries (tuples).
+
+    Posts entries are the published (or scheduled) ones, with the ids of their
+    sites (empty for all sites), limited to the ones which may be shown in the
+    menu of at least a site.
+    """
+    builder = PermalinkBuilder()
+    snapshot = {'categories': [], 'posts': [], 'capped': False}
+    categories = {}
+    with override(language):
+        if config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_CATEGORIES):
+            # categories already loaded for the menu are reused in the posts urls
+            categories = _load_categories(config, language)
+            snapshot['categories'] = _sort_categories(
+                category_entry(category, config, language, builder)
+                for category in categories.values()
+            )
+        if config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_POSTS):
+            snapshot['posts'], snapshot['capped'] = _limit_posts(_sort_posts(
+                _post_entries(config, language, builder, categories)
+            ), config)
+    return snapshot
+
+
+def store_snapshot(config, language, version=None):
+    """
+    Builds and stores the snapshot; the version is read before loading the
+    data, thus a snapshot missing a concurrent change is never current
+    """
+    version_key = get_version_key(config.namespace, language)
+    if version is None:
+        version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, _new_generation(), None)
+        version = cache.get(version_key)
+    snapshot = build_snapshot(config, language)
+    snapshot['version'] = version
+    cache.set(get_snapshot_key(config.namespace, language), snapshot,
+              get_setting('MENU_SNAPSHOT_DURATION'))
+    return snapshot
+
+
+def get_snapshot(config, language):
+    """
+    Returns the menu snapshot of the namespace for the language, building it if
+    missing or outdated
+    """
+    snapshot_key = get_snapshot_key(config.namespace, language)
+    version_key = get_version_key(config.namespace, language)
+    cached = cache.get_many([snapshot_key, version_key])
+    version = cached.get(version_key)
+    snapshot = cached.get(snapshot_key)
+    if snapshot is not None and version is not None and snapshot['version'] == version:
+        return snapshot
+    return store_snapshot(config, language, version)
+
+
+def _update_snapshot(config, language, update):
+    """
+    Applies ``update`` to the stored snapshot, if current.
+
+    The version is incremented first: if a concurrent change increments it
+    again before the patched snapshot is stored, the stored versions don't
+    match and the snapshot is rebuilt at the next read, thus no change is
+    lost. ``update`` returns ``False`` when the snapshot can't be patched.
+    """
+    try:
+        version = cache.incr(get_version_key(config.namespace, language))
+    except ValueError:
+        # no version: no snapshot can be current
+        return
+    key = get_snapshot_key(config.namespace, language)
+    snapshot = cache.get(key)
+    if snapshot is None or snapshot['version'] != version - 1:
+        return
+    with override(language):
+        if update(snapshot) is False:
+            return
+    snapshot['version'] = version
+    cache.set(key, snapshot, get_setting('MENU_SNAPSHOT_DURATION'))
+
+
+def _patch_posts(snapshot, config, language, builder, post_ids):
+    if config.menu_structure not in (MENU_TYPE_COMPLETE, MENU_TYPE_POSTS):
+        return
+    entries = dict(
+        (entry[POST_ID], entry)
+        for entry in _post_entries(config, language, builder, {}, pk__in=post_ids)
+    )
+    if snapshot['capped']:
+        for entry in snapshot['posts']:
+            if entry[POST_ID] not in post_ids:
+                continue
+            new = entries.get(entry[POST_ID])
+            # only titles and urls changes keep the posts order and groups
+            if new is None or new[:POST_TITLE] + new[POST_PUBLISHED:] != (
+                    entry[:POST_TITLE] + entry[POST_PUBLISHED:]):
+                # posts dropped from the snapshot may take the place of the changed one
+                return False
+    posts = [entry for entry in snapshot['posts'] if entry[POST_ID] not in post_ids]
+    snapshot['posts'], capped = _limit_posts(_sort_posts(posts + list(entries.values())), config)
+    snapshot['capped'] = snapshot['capped'] or capped
+
+
+def _patch_categories(snapshot, config, language, builder, category_ids):
+    if config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_CATEGORIES):
+        entries = [
+            category_entry(category, config, language, builder)
+            for category in _load_categories(config, language, pk__in=category_ids).values()
+        ]
+        snapshot['categories'] = _sort_categories([
+            entry for entry in snapshot['categories'] if entry[CATEGORY_ID] not in category_ids
+        ] + entries)
+    # posts urls may contain the category slug and deleted categories are not the first anymore
+    post_ids = set(
+        entry[POST_ID] for entry in snapshot['posts'] if entry[POST_CATEGORY] in category_ids
+    )
+    if post_ids:
+        return _patch_posts(snapshot, config, language, builder, post_ids)
+
+
+def _update_snapshots(app_config_id, patch, ids):
+    config = BlogConfig.objects.filter(pk=app_config_id).first()
+    if config is None or config.menu_structure not in (
+            MENU_TYPE_COMPLETE, MENU_TYPE_CATEGORIES, MENU_TYPE_POSTS):
+        return
+    builder = PermalinkBuilder()
+    ids = set(ids)
+    for language, __ in settings.LANGUAGES:
+        _update_snapshot(config, language, lambda snapshot: patch(
+            snapshot, config, language, builder, ids
+        ))
+
+
+def update_posts(post_ids, app_config_id=None):
+    """
+    Updates the entries of the given posts in the snapshots of their namespace
+    (looked up if not given)
+    """
+    if app_config_id is None:
+        for app_config_id in Post._default_manager.filter(pk__in=post_ids).order_by().values_list(
+                'app_config_id', flat=True).distinct():
+            _update_snapshots(app_config_id, _patch_posts, post_ids)
+    else:
+        _update_snapshots(app_config_id, _patch_posts, post_ids)
+
+
+def update_categories(category_ids, app_config_id=None):
+    """
+    Updates the entries of the given categories (and of the posts in them) in
+    the snapshots of their namespace (looked up if not given)
+    """
+    if app_config_id is None:
+        for app_config_id in BlogCategory._default_manager.filter(
+                pk__in=category_ids).order_by().values_list('app_config_id', flat=True).distinct():
+            _update_snapshots(app_config_id, _patch_categories, category_ids)
+    else:
+        _update_snapshots(app_config_id, _patch_categories, category_ids)
+
+
+def delete_snapshots(namespaces=None):
+    """
+    Makes the snapshots of the given namespaces (all by default) outdated
+    """
+    if namespaces is None:
+        namespaces = BlogConfig.objects.values_list('namespace', flat=True)
+    for namespace in namespaces:
+        for language, __ in settings.LANGUAGES:
+            try:
+                cache.incr(get_version_key(namespace, language))
+            except ValueError:
+                pass
+
+
+def rebuild_snapshots(configs=None):
+    """
+    Builds and stores the snapshots of the given blog configurations (all by
+    default), for all the languages; returns the number of snapshots
+    """
+    if configs is None:
+        configs = BlogConfig.objects.all()
+    count = 0
+    for config in configs:
+        for language, __ in settings.LANGUAGES:
+            store_snapshot(config, language)
+            count += 1
+    return count
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import hashlib
+
+from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.encoding import force_bytes
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+from easy_thumbnails.conf import settings as thumbnail_settings
+
+from ..metrics import record_cache
+from ..settings import get_setting
+from ..thumbnails import get_image_options, get_thumbnail_metadata
+
+register = template.Library()
+
+BLOG_ITEM_TEMPLATE = 'djangocms_blog/includes/blog_item.html'
+PREFETCH_CONTEXT_KEY = 'djangocms_blog_items'
+
+
+def _is_cacheable(context):
+    if not get_setting('ITEM_CACHE_DURATION'):
+        return False
+    toolbar = getattr(context.get('request'), 'toolbar', None)
+    return not (toolbar and toolbar.edit_mode)
+
+
+def _get_template_prefix(context):
+    config = getattr(context.get('view'), 'config', None)
+    if not config:
+        config = getattr(context.get('instance'), 'app_config', None)
+    if config:
+        return config.template_prefix or ''
+    return ''
+
+
+def _get_current_app(context):
+    request = context.get('request')
+    return getattr(request, 'current_app', None) or getattr(context, 'current_app', None)
+
+
+def get_item_cache_key(context, post, image, truncwords_count, template_name):
+    """
+    Cache key of a rendered post item: it changes whenever the post is saved
+    """
+    key = [
+        post.pk, get_language(), post.date_modified.isoformat(), truncwords_count,
+        _get_template_prefix(context), bool(image), _get_current_app(context), template_name,
+    ]
+    return 'djangocms_blog:item:%s' % hashlib.md5(force_bytes(repr(key))).hexdigest()
+
+
+@register.assignment_tag
+def blog_thumbnail(image, options):
+    """
+    Returns ``url``, ``width`` and ``height`` of the thumbnail of the image
+    with the given size options (as returned by ``Post.thumbnail_options`` and
+    ``Post.full_image_options``); metadata are stored when the thumbnail is
+    generated, thus rendering does not access the storage.
+
+    Usage::
+
+        {% blog_thumbnail post.main_image post.thumbnail_options as thumb %}
+        <img src="{{ thumb.url }}" width="{{ thumb.width }}" height="{{ thumb.height }}" />
+    """
+    if not image:
+        return ''
+    try:
+        return get_thumbnail_metadata(image, get_image_options(image, options))
+    except Exception:
+        if thumbnail_settings.THUMBNAIL_DEBUG:
+            raise
+        return ''
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_blog_items(context, posts, image=False, TRUNCWORDS_COUNT=None,
+                        template_name=BLOG_ITEM_TEMPLATE):
+    """
+    Fetches the cached items for the given posts with a single cache query;
+    use before rendering the posts with ``render_blog_item``.
+
+    Usage::
+
+        {% prefetch_blog_items post_list image="true" TRUNCWORDS_COUNT=TRUNCWORDS_COUNT %}
+    """
+    if _is_cacheable(context):
+        keys = [
+            get_item_cache_key(context, post, image, TRUNCWORDS_COUNT, template_name)
+            for post in posts
+        ]
+        prefetched = dict((key, None) for key in keys)
+        prefetched.update(cache.get_many(keys))
+        context.render_context[PREFETCH_CONTEXT_KEY] = prefetched
+    return ''
+
+
+@register.simple_tag(takes_context=True)
+def render_blog_item(context, post, image=False, TRUNCWORDS_COUNT=None,
+                     template_name=BLOG_ITEM_TEMPLATE):
+    """
+    Renders a post item template (``djangocms_blog/includes/blog_item.html`` by
+    default) like ``{% include %}`` does, caching the result.
+
+    Usage::
+
+        {% render_blog_item post image="true" TRUNCWORDS_COUNT=TRUNCWORDS_COUNT %}
+    """
+    cacheable = _is_cacheable(context)
+    if cacheable:
+        key = get_item_cache_key(context, post, image, TRUNCWORDS_COUNT, template_name)
+        prefetched = context.render_context.get(PREFETCH_CONTEXT_KEY, {})
+        if key in prefetched:
+            content = prefetched[key]
+        else:
+            content = cache.get(key)
+        record_cache(content is not None)
+        if content is not None:
+            return mark_safe(content)
+    item_template = get_template(template_name)
+    # Django 1.8+ returns a backend dependent template wrapper
+    item_template = getattr(item_template, 'template', item_template)
+    context.update({'post': post, 'image': image, 'TRUNCWORDS_COUNT': TRUNCWORDS_COUNT})
+    try:
+        content = item_template.render(context)
+    finally:
+        context.pop()
+    if cacheable:
+        cache.set(key, content, get_setting('ITEM_CACHE_DURATION'))
+    return mark_safe(content)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import hashlib
+import logging
+import re
+from multiprocessing import Pool
+
+from django.core.cache import cache
+from django.db import connections
+from django.utils import six
+from django.utils.encoding import force_bytes
+from easy_thumbnails.files import get_thumbnailer
+
+from .metrics import record_cache
+from .models import Post
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+RE_SIZE = re.compile(r'(\d+)x(\d+)$')
+GENERATED = 'generated'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+def get_image_options(image, options):
+    """
+    Returns the easy_thumbnails options built by the ``thumbnail`` tag in the
+    blog templates for the given image and size options
+    (``Post.thumbnail_options()`` / ``Post.full_image_options()``), so that
+    pre-generated thumbnails are the ones requested on render.
+    """
+    size = options['size']
+    if isinstance(size, six.string_types):
+        match = RE_SIZE.match(size)
+        if match:
+            size = (int(match.group(1)), int(match.group(2)))
+    return {
+        'size': size,
+        'crop': options.get('crop', ''),
+        'upscale': options.get('upscale', ''),
+        'subject_location': image.subject_location,
+    }
+
+
+def get_post_thumbnails(post):
+    """
+    Returns the (image, options) couples of the thumbnails rendered for the
+    given post: list thumbnail and detail full size image
+    """
+    if not post.main_image_id:
+        return []
+    image = post.main_image
+    thumbnails = []
+    for options in (post.thumbnail_options(), post.full_image_options()):
+        options = get_image_options(image, options)
+        if options not in [thumbnail[1] for thumbnail in thumbnails]:
+            thumbnails.append((image, options))
+    return thumbnails
+
+
+def get_thumbnails(queryset=None):
+    """
+    Yields the (image, options) couples for the posts in the queryset (all
+    the posts with a main image by default)
+    """
+    if queryset is None:
+        queryset = Post._default_manager.all()
+    queryset = queryset.filter(main_image__isnull=False).select_related(
+        'main_image', 'main_image_thumbnail', 'main_image_full'
+    ).order_by('pk')
+    for post in queryset:
+        for thumbnail in get_post_thumbnails(post):
+            yield thumbnail
+
+
+def get_metadata_cache_key(image, options):
+    """
+    Cache key of the thumbnail metadata: it changes whenever the image file
+    or the thumbnail options change
+    """
+    modified = getattr(image, 'modified_at', None)
+    key = [image.pk, modified.isoformat() if modified else None, sorted(options.items())]
+    return 'djangocms_blog:thumbnail:%s' % hashlib.md5(force_bytes(repr(key))).hexdigest()
+
+
+def store_thumbnail_metadata(image, options, thumbnail):
+    """
+    Stores url and dimensions of the given thumbnail file
+    """
+    metadata = {'url': thumbnail.url, 'width': thumbnail.width, 'height': thumbnail.height}
+    cache.set(
+        get_metadata_cache_key(image, options), metadata,
+        get_setting('THUMBNAIL_CACHE_DURATION')
+    )
+    return metadata
+
+
+def get_thumbnail_metadata(image, options):
+    """
+    Returns a dictionary with the ``url``, ``width`` and ``height`` of the
+    thumbnail, without accessing the storage if the thumbnail metadata are
+    already stored (the thumbnail is generated if needed).
+    """
+    metadata = cache.get(get_metadata_cache_key(image, options))
+    record_cache(metadata is not None)
+    if metadata is None:
+        thumbnail = get_thumbnailer(image).get_thumbnail(options)
+        metadata = store_thumbnail_metadata(image, options, thumbnail)
+    return metadata
+
+
+def generate_thumbnail(image, options):
+    """
+    Generates the thumbnail unless it already exists and stores its metadata
+
+    Returns ``GENERATED``, ``SKIPPED`` or ``FAILED``.
+    """
+    try:
+        thumbnailer = get_thumbnailer(image)
+        thumbnail = thumbnailer.get_existing_thumbnail(options)
+        if thumbnail:
+            store_thumbnail_metadata(image, options, thumbnail)
+            return SKIPPED
+        thumbnail = thumbnailer.get_thumbnail(options, generate=True)
+        store_thumbnail_metadata(image, options, thumbnail)
+        return GENERATED
+    except Exception:
+        logger.exception('Error generating thumbnail %s of image %s', options, image.pk)
+        return FAILED
+
+
+def _generate_thumbnail_task(task):
+    image_id, options = task
+    image = Post._meta.get_field('main_image').rel.to.objects.filter(pk=image_id).first()
+    if image is None:
+        return image_id, FAILED
+    return image_id, generate_thumbnail(image, options)
+
+
+def pregenerate_thumbnails(thumbnails, workers=1):
+    """
+    Generates the given (image, options) thumbnails, using a pool of
+    ``workers`` processes if more than one.
+
+    Yields a (image id, result) couple for each thumbnail, in completion order.
+    """
+    if workers > 1:
+        tasks = [(image.pk, options) for image, options in thumbnails]
+        # forked processes must not share the parent database connections
+        for connection in connections.all():
+            connection.close()
+        pool = Pool(workers)
+        try:
+            for result in pool.imap_unordered(_generate_thumbnail_task, tasks):
+                yield result
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for image, options in thumbnails:
+            yield image.pk, generate_thumbnail(image, options)
@@ -3,7 +3,8 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 from django.conf.urls import url
 
-from .feeds import LatestEntriesFeed, TagFeed
+from .api import CategoryApiListView, PostApiDetailView, PostApiListView, TagApiListView
+from .feeds import AuthorFeed, CategoryFeed, LatestEntriesAtomFeed, LatestEntriesFeed, TagFeed
 from .settings import get_setting
 from .views import (
     AuthorEntriesView, CategoryEntriesView, PostArchiveView, PostDetailView, PostListView,
@@ -22,21 +23,44 @@ def get_urls():
 
 detail_urls = get_urls()
 
+
+def get_api_urls():
+    if not get_setting('ENABLE_API'):
+        return []
+    return [
+        url(r'^api/posts/$',
+            PostApiListView.as_view(), name='api-posts'),
+        url(r'^api/posts/(?P<slug>\w[-\w]*)/$',
+            PostApiDetailView.as_view(), name='api-post-detail'),
+        url(r'^api/categories/$',
+            CategoryApiListView.as_view(), name='api-categories'),
+        url(r'^api/tags/$',
+            TagApiListView.as_view(), name='api-tags'),
+    ]
+
+api_urls = get_api_urls()
+
 urlpatterns = [
     url(r'^$',
         PostListView.as_view(), name='posts-latest'),
     url(r'^feed/$',
         LatestEntriesFeed(), name='posts-latest-feed'),
+    url(r'^feed/atom/$',
+        LatestEntriesAtomFeed(), name='posts-latest-feed-atom'),
     url(r'^(?P<year>\d{4})/$',
         PostArchiveView.as_view(), name='posts-archive'),
     url(r'^(?P<year>\d{4})/(?P<month>\d{1,2})/$',
         PostArchiveView.as_view(), name='posts-archive'),
     url(r'^author/(?P<username>[\w\.@+-]+)/$',
         AuthorEntriesView.as_view(), name='posts-author'),
+    url(r'^author/(?P<username>[\w\.@+-]+)/feed/$',
+        AuthorFeed(), name='posts-author-feed'),
     url(r'^category/(?P<category>[\w\.@+-]+)/$',
         CategoryEntriesView.as_view(), name='posts-category'),
+    url(r'^category/(?P<category>[\w\.@+-]+)/feed/$',
+        CategoryFeed(), name='posts-category-feed'),
     url(r'^tag/(?P<tag>[-\w]+)/$',
         TaggedListView.as_view(), name='posts-tagged'),
     url(r'^tag/(?P<tag>[-\w]+)/feed/$',
         TagFeed(), name='posts-tagged-feed'),
-] + detail_urls
+] + api_urls + detail_urls
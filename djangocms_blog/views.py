@@ -12,6 +12,7 @@ from django.utils.translation import get_language
 from django.views.generic import DetailView, ListView
 from parler.views import TranslatableSlugMixin, ViewUrlMixin
 
+from .metrics import measure
 from .models import BlogCategory, Post
 from .settings import get_setting
 
@@ -20,6 +21,20 @@ User = get_user_model()
 
 class BaseBlogView(AppConfigMixin, ViewUrlMixin):
 
+    def dispatch(self, request, *args, **kwargs):
+        measurement = measure('view.%s' % self.__class__.__name__, path=request.path).start()
+        try:
+            response = super(BaseBlogView, self).dispatch(request, *args, **kwargs)
+        except Exception:
+            measurement.stop()
+            raise
+        if getattr(response, 'is_rendered', True):
+            measurement.stop()
+        else:
+            # template responses are rendered after the view returns
+            response.add_post_render_callback(lambda response: measurement.stop())
+        return response
+
     def get_view_url(self):
         if not self.view_url_name:
             raise ImproperlyConfigured(
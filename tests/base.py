@@ -6,6 +6,7 @@ from copy import deepcopy
 from cmsplugin_filer_image.models import ThumbnailOption
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from djangocms_helper.base_test import BaseTestCase
 from haystack import connections
 from haystack.constants import DEFAULT_ALIAS
@@ -126,6 +127,10 @@ class BaseTest(BaseTestCase):
         cls.category_1.save()
         cls.site_2 = Site.objects.create(domain='http://example2.com', name='example 2')
 
+    def setUp(self):
+        super(BaseTest, self).setUp()
+        cache.clear()
+
     @classmethod
     def tearDownClass(cls):
         super(BaseTest, cls).tearDownClass()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from parler.utils.context import smart_override
+
+from djangocms_blog.api import (
+    CategoryApiListView, PostApiDetailView, PostApiListView, TagApiListView,
+)
+
+from .base import BaseTest
+
+
+class ApiTest(BaseTest):
+
+    def _get(self, view, page, path, **kwargs):
+        request = self.get_request(page, 'en', AnonymousUser(), path=path)
+        request.META.update(kwargs)
+        return view.as_view()(request)
+
+    def test_post_list_sparse_fields(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        posts[0].tags.add('tag 1')
+        path = '/en/page-two/api/posts/'
+
+        with smart_override('en'):
+            # config, next scheduled transition (2, cached for the ETag), ETag aggregate,
+            # count, page and translations: no tags, categories or images are fetched
+            with self.assertNumQueries(7):
+                response = self._get(PostApiListView, pages[1], path + '?fields=title,url')
+            data = json.loads(response.content.decode('utf-8'))
+            self.assertEqual(data['count'], 1)
+            self.assertEqual(data['results'], [{
+                'title': posts[0].title,
+                'url': 'http://testserver%s' % posts[0].get_absolute_url(),
+            }])
+
+            response = self._get(PostApiListView, pages[1], path)
+            data = json.loads(response.content.decode('utf-8'))
+            result = data['results'][0]
+            self.assertEqual(result['id'], posts[0].pk)
+            self.assertEqual(result['tags'], [{'name': 'tag 1', 'slug': 'tag-1'}])
+            self.assertEqual(result['categories'][0]['id'], self.category_1.pk)
+            self.assertTrue(result['main_image']['url'])
+            self.assertFalse('content' in result)
+
+    def test_post_list_etag(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        path = '/en/page-two/api/posts/?fields=title'
+
+        with smart_override('en'):
+            response = self._get(PostApiListView, pages[1], path)
+            etag = response['ETag']
+            self.assertEqual(response.status_code, 200)
+
+            response = self._get(PostApiListView, pages[1], path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+            # a different field set is a different representation
+            response = self._get(
+                PostApiListView, pages[1], path + ',slug', HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, 200)
+
+            posts[1].publish = True
+            posts[1].save()
+            response = self._get(PostApiListView, pages[1], path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+            # related data changes are not tracked by the posts aggregates
+            etag = response['ETag']
+            self.category_1.set_current_language('en')
+            self.category_1.name = 'category renamed'
+            self.category_1.save()
+            response = self._get(PostApiListView, pages[1], path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_list_dates(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        path = '/en/page-two/api/posts/?fields=id'
+        date = posts[0].date_published
+
+        with smart_override('en'):
+            response = self._get(
+                PostApiListView, pages[1], path + '&year=%s&month=%s' % (date.year, date.month)
+            )
+            data = json.loads(response.content.decode('utf-8'))
+            self.assertEqual(data['results'], [{'id': posts[0].pk}])
+
+            for query in ('&year=abc', '&month=1x', '&month=13', '&year=0', '&year=100000'):
+                with self.assertRaises(Http404):
+                    self._get(PostApiListView, pages[1], path + query)
+
+    def test_post_detail(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+
+        with smart_override('en'):
+            request = self.get_request(
+                pages[1], 'en', AnonymousUser(), path='/en/page-two/api/posts/first-post/'
+            )
+            response = PostApiDetailView.as_view()(request, slug='first-post')
+            data = json.loads(response.content.decode('utf-8'))
+            self.assertEqual(data['id'], posts[0].pk)
+            self.assertEqual(data['abstract'], posts[0].abstract)
+            self.assertTrue('content' in data)
+
+            request = self.get_request(
+                pages[1], 'en', AnonymousUser(), path='/en/page-two/api/posts/second-post/'
+            )
+            with self.assertRaises(Http404):
+                PostApiDetailView.as_view()(request, slug='second-post')
+
+    def test_categories_tags(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        posts[0].tags.add('tag 1', 'tag 2')
+        posts[1].tags.add('tag 2')
+
+        with smart_override('en'):
+            response = self._get(CategoryApiListView, pages[1], '/en/page-two/api/categories/')
+            data = json.loads(response.content.decode('utf-8'))
+            self.assertEqual(data['results'][0]['id'], self.category_1.pk)
+            self.assertEqual(data['results'][0]['count'], 1)
+
+            response = self._get(TagApiListView, pages[1], '/en/page-two/api/tags/')
+            data = json.loads(response.content.decode('utf-8'))
+            self.assertEqual(
+                sorted((tag['slug'], tag['count']) for tag in data['results']),
+                [('tag-1', 1), ('tag-2', 1)]
+            )
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import csv
+import io
+import json
+
+from cms.api import add_plugin
+from django.contrib import admin
+from django.core.management import call_command
+from django.utils import six
+from django.utils.six import StringIO
+from parler.utils.context import smart_override
+
+from djangocms_blog.export import PostExporter
+from djangocms_blog.models import Post
+
+from .base import BaseTest
+
+
+class ExportTest(BaseTest):
+
+    def test_export_rows(self):
+        posts = self.get_posts()
+        posts[0].tags.add('tag 1')
+        posts[1].categories.add(self.category_1)
+        add_plugin(posts[0].content, 'TextPlugin', language='en', body='<p>Content text</p>')
+        add_plugin(posts[0].content, 'TextPlugin', language='it', body='<p>Testo</p>')
+
+        exporter = PostExporter(Post.objects.all(), placeholder_text=True, chunk_size=1)
+        rows = list(exporter.rows())
+        self.assertEqual(
+            [(row['id'], row['language']) for row in rows],
+            [(post.pk, language) for post in posts for language in ('en', 'it')]
+        )
+        self.assertEqual(rows[0]['title'], 'First post')
+        self.assertEqual(rows[1]['title'], 'Primo post')
+        self.assertEqual(rows[0]['tags'], ['tag 1'])
+        self.assertEqual(rows[0]['categories'], ['category 1'])
+        self.assertEqual(rows[1]['categories'], ['categoria 1'])
+        self.assertEqual(rows[0]['content'], 'Content text')
+        self.assertEqual(rows[1]['content'], 'Testo')
+        self.assertEqual(rows[2]['content'], '')
+        self.assertEqual(rows[0]['author'], self.user.get_username())
+
+        self.get_pages()
+        with smart_override('en'):
+            rows = list(PostExporter(Post.objects.filter(pk=posts[0].pk)).rows())
+        for row in rows:
+            with smart_override(row['language']):
+                self.assertEqual(row['url'], posts[0].get_absolute_url())
+            self.assertTrue(row['url'].startswith('/%s/' % row['language']))
+
+        exporter = PostExporter(Post.objects.published(), languages=['it'])
+        rows = list(exporter.rows())
+        self.assertEqual(
+            [(row['id'], row['language']) for row in rows],
+            [(posts[0].pk, 'it'), (posts[3].pk, 'it')]
+        )
+        self.assertFalse('content' in rows[0])
+
+    def test_export_queries(self):
+        self.get_posts()
+        exporter = PostExporter(Post.objects.all(), chunk_size=2)
+        # two chunks, each loading posts and their translations, categories,
+        # categories translations, tags and sites + the final empty chunk
+        with self.assertNumQueries(13):
+            list(exporter.rows())
+
+    def test_export_command(self):
+        posts = self.get_posts()
+        output = StringIO()
+        call_command('blog_export', stdout=output, published=True)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(
+            set(json.loads(line)['id'] for line in lines), set((posts[0].pk, posts[3].pk))
+        )
+
+        output = StringIO()
+        call_command('blog_export', stdout=output, format='csv', languages=['en'])
+        value = output.getvalue()
+        if six.PY2:
+            value = value.encode('utf-8')
+        rows = list(csv.reader(io.BytesIO(value) if six.PY2 else StringIO(value)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0][:3], ['id', 'language', 'title'])
+        self.assertEqual(rows[2][2], 'Second post')
+
+    def test_export_admin_action(self):
+        posts = self.get_posts()
+        admin.autodiscover()
+        post_admin = admin.site._registry[Post]
+        request = self.get_page_request('/', self.user, r'/en/blog/', edit=False)
+        response = post_admin.export_jsonl(request, Post.objects.filter(pk=posts[1].pk))
+        content = b''.join(response.streaming_content).decode('utf-8')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(set(row['language'] for row in rows), set(('en', 'it')))
+        self.assertEqual(rows[0]['id'], posts[1].pk)
+        self.assertTrue(response['Content-Disposition'].endswith('posts.jsonl"'))
@@ -1,15 +1,28 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 
+from datetime import timedelta
+
 from aldryn_apphooks_config.utils import get_app_instance
 from django.core.cache import cache
+from django.core.management import call_command
+from django.utils.six import StringIO
+from django.utils.timezone import now
 from django.utils.translation import activate
 from menus.menu_pool import menu_pool
+from mock import patch
 from parler.utils.context import smart_override, switch_language
 
+from djangocms_blog import snapshots
+from djangocms_blog.menu import BlogCategoryMenu, get_transition_key, menu_invalidation_batch
+from djangocms_blog.models import BlogCategory
 from djangocms_blog.settings import (
     MENU_TYPE_CATEGORIES, MENU_TYPE_COMPLETE, MENU_TYPE_NONE, MENU_TYPE_POSTS,
 )
+from djangocms_blog.snapshots import (
+    CATEGORY_ID, POST_ID, POST_SITES, POST_TITLE, POST_URL, build_snapshot, get_snapshot,
+    get_version_key,
+)
 from djangocms_blog.views import CategoryEntriesView, PostDetailView
 
 from .base import BaseTest
@@ -48,6 +61,286 @@ class MenuTest(BaseTest):
                 cats_url = set([cat.get_absolute_url() for cat in self.cats if cat.has_translation(lang)])
                 self.assertTrue(cats_url.issubset(nodes_url))
 
+    def test_menu_nodes_queries(self):
+        """
+        Tests that the menu is built with a fixed number of queries and the
+        same URLs as get_absolute_url for any permalink style
+        """
+        posts = self.get_posts()
+        pages = self.get_pages()
+        for post in posts:
+            post.categories.add(self.cats[2])
+        menu = BlogCategoryMenu()
+        menu.instance = pages[1]
+        for permalink in ('full_date', 'short_date', 'category', 'slug'):
+            self.app_config_1.app_data.config.url_patterns = permalink
+            self.app_config_1.save()
+            for lang in ('en', 'it'):
+                request = self.get_page_request(None, self.user, r'/%s/page-two/' % lang)
+                with smart_override(lang):
+                    expected = set()
+                    for post in posts:
+                        if post.app_config == self.app_config_1 and post.publish:
+                            post.app_config = self.app_config_1
+                            expected.add(post.get_absolute_url())
+                    expected.update(
+                        cat.get_absolute_url() for cat in self.cats
+                        if cat.app_config == self.app_config_1
+                    )
+                    # config, categories and translations, posts and translations,
+                    # posts categories and sites, next scheduled post publication / expiration
+                    cache.clear()
+                    with self.assertNumQueries(9):
+                        nodes = menu.get_nodes(request)
+                    self.assertEqual(expected, set(node.url for node in nodes))
+        self.app_config_1.app_data.config.url_patterns = 'full_date'
+        self.app_config_1.save()
+
+    def test_menu_posts_bounded(self):
+        """
+        Tests the posts limit per category and the selected category only option
+        """
+        posts = self.get_posts()
+        pages = self.get_pages()
+        for post in posts:
+            post.publish = True
+            post.save()
+
+        def post_nodes(nodes):
+            return set(
+                node.url for node in nodes
+                if node.attr.get('blog_post') and node.url.startswith('/en/page-two/')
+            )
+
+        self.app_config_1.app_data.config.menu_posts_limit = 1
+        self.app_config_1.save()
+        cache.clear()
+        request = self.get_page_request(None, self.user, r'/en/page-two/')
+        with smart_override('en'):
+            nodes = menu_pool.get_nodes(request, namespace='BlogCategoryMenu')
+            # latest post of category 1 (first category of all posts)
+            self.assertEqual(post_nodes(nodes), set([posts[2].get_absolute_url()]))
+
+        self.app_config_1.app_data.config.menu_posts_limit = None
+        self.app_config_1.app_data.config.menu_selected_category_only = True
+        self.app_config_1.save()
+        cache.clear()
+        with smart_override('en'):
+            request = self.get_page_request(pages[1], self.user, r'/en/page-two/')
+            nodes = menu_pool.get_nodes(request, namespace='BlogCategoryMenu')
+            self.assertEqual(post_nodes(nodes), set())
+            for url in (self.category_1.get_absolute_url(), posts[1].get_absolute_url()):
+                request = self.get_page_request(pages[1], self.user, url)
+                nodes = menu_pool.get_nodes(request, namespace='BlogCategoryMenu')
+                self.assertEqual(
+                    post_nodes(nodes), set(post.get_absolute_url() for post in posts[:3])
+                )
+        self.app_config_1.app_data.config.menu_selected_category_only = False
+        self.app_config_1.save()
+
+    def test_menu_invalidation(self):
+        """
+        Tests that menu cache is cleared only for the languages / sites of the
+        changed content
+        """
+        posts = self.get_posts()
+        self.get_pages()
+        with patch.object(menu_pool, 'clear') as clear:
+            posts[0].save()
+            # en is the fallback language of fr
+            self.assertEqual(
+                set(call[0] for call in clear.call_args_list),
+                set([(None, 'en'), (None, 'fr'), (None, 'it')])
+            )
+            clear.reset_mock()
+            posts[0].sites.add(self.site_2)
+            posts[0].save()
+            self.assertTrue((self.site_2.pk, 'en') in [call[0] for call in clear.call_args_list])
+
+            clear.reset_mock()
+            self.app_config_1.app_data.config.menu_structure = MENU_TYPE_CATEGORIES
+            self.app_config_1.save()
+            clear.reset_mock()
+            posts[1].save()
+            self.assertFalse(clear.called)
+            self.category_1.save()
+            self.assertTrue(clear.called)
+            self.app_config_1.app_data.config.menu_structure = MENU_TYPE_COMPLETE
+            self.app_config_1.save()
+
+            clear.reset_mock()
+            with menu_invalidation_batch():
+                for post in posts:
+                    post.save()
+                self.assertFalse(clear.called)
+            self.assertEqual(len(clear.call_args_list), 3)
+
+    def test_menu_transition(self):
+        """
+        Tests that menu cache is cleared when a scheduled post is published
+        """
+        posts = self.get_posts()
+        pages = self.get_pages()
+        posts[1].publish = True
+        posts[1].date_published = now() + timedelta(days=1)
+        posts[1].save()
+        request = self.get_page_request(pages[1], self.user, r'/en/page-two/')
+        with smart_override('en'):
+            menu_pool.get_nodes(request, namespace='BlogCategoryMenu')
+            key = get_transition_key('en')
+            self.assertEqual(cache.get(key), posts[1].date_published)
+            with patch.object(menu_pool, 'clear') as clear:
+                menu_pool.get_nodes(request, namespace='BlogCategoryMenu')
+                self.assertFalse(clear.called)
+                cache.set(key, now() - timedelta(seconds=1))
+                menu_pool.get_nodes(request, namespace='BlogCategoryMenu')
+                clear.assert_called_once_with(self.site_1.pk, 'en')
+            self.assertEqual(cache.get(key), None)
+
+    def assertSnapshotPatched(self, config, language):
+        """
+        Checks that the stored snapshot is current (not rebuilt) and matches the
+        data in the database
+        """
+        with self.assertNumQueries(0):
+            snapshot = get_snapshot(config, language)
+        expected = build_snapshot(config, language)
+        self.assertEqual(snapshot['categories'], expected['categories'])
+        self.assertEqual(snapshot['posts'], expected['posts'])
+        return snapshot
+
+    def test_menu_snapshots(self):
+        """
+        Tests that menu snapshots are patched when posts and categories change
+        """
+        posts = self.get_posts()
+        self.get_pages()
+        with smart_override('en'):
+            snapshot = get_snapshot(self.app_config_1, 'en')
+            self.assertEqual(
+                [entry[POST_ID] for entry in snapshot['posts']], [posts[0].pk]
+            )
+            with self.assertNumQueries(0):
+                self.assertEqual(get_snapshot(self.app_config_1, 'en'), snapshot)
+
+            posts[0].set_current_language('en')
+            posts[0].title = 'Changed title'
+            posts[0].save()
+            posts[1].publish = True
+            posts[1].save()
+            category = BlogCategory.objects.create(name='new category', app_config=self.app_config_1)
+            snapshot = self.assertSnapshotPatched(self.app_config_1, 'en')
+            self.assertEqual(
+                [entry[POST_ID] for entry in snapshot['posts']], [posts[1].pk, posts[0].pk]
+            )
+            self.assertEqual(snapshot['posts'][1][POST_TITLE], 'Changed title')
+            self.assertEqual(snapshot['posts'][1][POST_URL], posts[0].get_absolute_url())
+            self.assertEqual(snapshot['posts'][1][POST_SITES], ())
+            self.assertTrue(category.pk in [entry[CATEGORY_ID] for entry in snapshot['categories']])
+
+            posts[1].delete()
+            posts[0].sites.add(self.site_2)
+            category.delete()
+            snapshot = self.assertSnapshotPatched(self.app_config_1, 'en')
+            self.assertEqual(
+                [entry[POST_SITES] for entry in snapshot['posts']], [(self.site_2.pk,)]
+            )
+
+            # category permalinks
+            self.app_config_1.app_data.config.url_patterns = 'category'
+            self.app_config_1.save()
+            try:
+                get_snapshot(self.app_config_1, 'en')
+                self.category_1.set_current_language('en')
+                self.category_1.slug = 'changed-category'
+                self.category_1.save()
+                snapshot = self.assertSnapshotPatched(self.app_config_1, 'en')
+                self.assertTrue('/changed-category/' in snapshot['posts'][0][POST_URL])
+            finally:
+                self.app_config_1.app_data.config.url_patterns = 'full_date'
+                self.app_config_1.save()
+
+            # translations deletion
+            get_snapshot(self.app_config_1, 'it')
+            posts[0].translations.get(language_code='it').delete()
+            self.assertSnapshotPatched(self.app_config_1, 'it')
+
+            # concurrent change: the patched snapshot is not current and it's rebuilt
+            cache.incr(get_version_key(self.app_config_1.namespace, 'en'))
+            posts[0].save()
+            with patch.object(snapshots, 'build_snapshot', wraps=build_snapshot) as build:
+                get_snapshot(self.app_config_1, 'en')
+                self.assertTrue(build.called)
+
+        output = StringIO()
+        call_command('blog_menu_snapshots', stdout=output, namespace=self.app_config_1.namespace)
+        self.assertEqual(output.getvalue().strip(), 'Rebuilt 3 menu snapshots')
+
+    def test_menu_snapshot_category_permalinks(self):
+        """
+        Tests the URLs of uncategorized posts and of posts in untranslated
+        categories with the category permalink style
+        """
+        posts = self.get_posts()
+        self.get_pages()
+        posts[1].publish = True
+        posts[1].save()
+        posts[0].categories.clear()
+        with smart_override('en'):
+            category = BlogCategory.objects.create(name='English only', app_config=self.app_config_1)
+        posts[1].categories.clear()
+        posts[1].categories.add(category)
+        self.app_config_1.app_data.config.url_patterns = 'category'
+        self.app_config_1.save()
+        try:
+            for language in ('en', 'it'):
+                with smart_override(language):
+                    snapshot = get_snapshot(self.app_config_1, language)
+                    self.assertEqual(len(snapshot['posts']), 2)
+                    for entry in snapshot['posts']:
+                        post = [post for post in posts if post.pk == entry[POST_ID]][0]
+                        self.assertFalse('/None/' in entry[POST_URL])
+                        self.assertEqual(entry[POST_URL], post.get_absolute_url())
+        finally:
+            self.app_config_1.app_data.config.url_patterns = 'full_date'
+            self.app_config_1.save()
+
+    def test_menu_snapshot_limit(self):
+        """
+        Tests that menu snapshots only hold the posts shown in the menu
+        """
+        posts = self.get_posts()
+        self.get_pages()
+        for post in posts:
+            post.publish = True
+            post.save()
+        posts[0].sites.add(self.site_2)
+        posts[1].sites.add(self.site_1)
+        posts[2].sites.add(self.site_1)
+        self.app_config_1.app_data.config.menu_posts_limit = 1
+        self.app_config_1.save()
+        try:
+            snapshot = get_snapshot(self.app_config_1, 'en')
+            # latest post of site 1 and the one of site 2
+            self.assertEqual(
+                [entry[POST_ID] for entry in snapshot['posts']], [posts[2].pk, posts[0].pk]
+            )
+            # title changes are patched, removed posts may be replaced by dropped ones
+            posts[2].set_current_language('en')
+            posts[2].title = 'Changed title'
+            posts[2].save()
+            self.assertSnapshotPatched(self.app_config_1, 'en')
+            posts[2].publish = False
+            posts[2].save()
+            snapshot = get_snapshot(self.app_config_1, 'en')
+            self.assertEqual(
+                [entry[POST_ID] for entry in snapshot['posts']], [posts[1].pk, posts[0].pk]
+            )
+        finally:
+            self.app_config_1.app_data.config.menu_posts_limit = None
+            self.app_config_1.save()
+        self.assertEqual(len(get_snapshot(self.app_config_1, 'en')['posts']), 2)
+
     def test_menu_options(self):
         """
         Tests menu structure based on menu_structure configuration
@@ -63,7 +356,7 @@ class MenuTest(BaseTest):
         for lang in languages:
             with smart_override(lang):
                 cats_url[lang] = set([cat.get_absolute_url() for cat in self.cats if cat.has_translation(lang)])
-                posts_url[lang] = set([post.get_absolute_url() for post in posts if post.has_translation(lang) and post.app_config == self.app_config_1])
+                posts_url[lang] = set([post.get_absolute_url() for post in posts if post.has_translation(lang) and post.app_config == self.app_config_1 and post.publish])
 
         # No item in the menu
         self.app_config_1.app_data.config.menu_structure = MENU_TYPE_NONE
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+from cms.api import add_plugin
+from django.contrib.auth.models import AnonymousUser
+from django.core.signals import request_finished
+from django.db import connection
+from parler.utils.context import smart_override
+
+from djangocms_blog.metrics import (
+    CountingCursorWrapper, MemorySink, NullMeasurement, StatsdSink, measure, record_cache,
+)
+from djangocms_blog.models import Post
+from djangocms_blog.views import PostListView
+
+from .base import BaseTest
+
+
+class MetricsTest(BaseTest):
+
+    def setUp(self):
+        super(MetricsTest, self).setUp()
+        MemorySink.clear()
+
+    def test_measure(self):
+        self.assertTrue(isinstance(measure('test'), NullMeasurement))
+        with self.settings(BLOG_METRICS_SINK='djangocms_blog.metrics.MemorySink'):
+            with measure('test', path='/'):
+                self.get_posts()
+                record_cache(True)
+                record_cache(False)
+            # outside measurements cache counts are discarded
+            record_cache(True)
+        self.assertEqual(len(MemorySink.records), 1)
+        name, metrics, tags = MemorySink.records[0]
+        self.assertEqual(name, 'test')
+        self.assertEqual(tags, {'path': '/'})
+        self.assertTrue(metrics['queries'] > 0)
+        self.assertTrue(metrics['time'] >= metrics['query_time'])
+        self.assertEqual(metrics['cache_hits'], 1)
+        self.assertEqual(metrics['cache_misses'], 1)
+
+    def test_measure_queries(self):
+        self.get_posts()
+        with self.settings(BLOG_METRICS_SINK='djangocms_blog.metrics.MemorySink'):
+            with measure('outer'):
+                Post.objects.count()
+                with measure('inner'):
+                    self.assertIsInstance(connection.cursor(), CountingCursorWrapper)
+                    list(Post.objects.all()[:1])
+                    Post.objects.exists()
+        self.assertEqual(
+            [(name, metrics['queries']) for name, metrics, tags in MemorySink.records],
+            [('inner', 2), ('outer', 3)]
+        )
+        # cursors are not wrapped once measurements are stopped
+        self.assertNotIsInstance(connection.cursor(), CountingCursorWrapper)
+
+    def test_discard_measurements(self):
+        with self.settings(BLOG_METRICS_SINK='djangocms_blog.metrics.MemorySink'):
+            measure('test').start()
+            request_finished.send(sender=self.__class__)
+        self.assertNotIsInstance(connection.cursor(), CountingCursorWrapper)
+        with self.settings(BLOG_METRICS_SINK='djangocms_blog.metrics.MemorySink'):
+            with measure('other'):
+                pass
+        self.assertEqual([record[0] for record in MemorySink.records], ['other'])
+
+    def test_plugin_metrics(self):
+        pages = self.get_pages()
+        self.get_posts()
+        ph = pages[0].placeholders.get(slot='content')
+        plugin = add_plugin(
+            ph, 'BlogLatestEntriesPluginCached', language='en', app_config=self.app_config_1
+        )
+        plugin_class = plugin.get_plugin_class_instance()
+        with self.settings(BLOG_METRICS_SINK='djangocms_blog.metrics.MemorySink'):
+            for __ in range(2):
+                context = self.get_plugin_context(pages[0], 'en', plugin)
+                plugin_class.render(context, plugin, ph)
+        self.assertEqual(
+            [record[0] for record in MemorySink.records],
+            ['plugin.BlogLatestEntriesPluginCached'] * 2
+        )
+        first, second = [record[1] for record in MemorySink.records]
+        self.assertEqual((first['cache_hits'], first['cache_misses']), (0, 1))
+        self.assertEqual((second['cache_hits'], second['cache_misses']), (1, 0))
+        self.assertTrue(first['queries'] > second['queries'])
+        self.assertEqual(MemorySink.records[0][2]['plugin'], plugin.pk)
+        self.assertEqual(MemorySink.records[0][2]['placeholder'], 'content')
+
+    def test_latest_entries_plugin_metrics(self):
+        pages = self.get_pages()
+        self.get_posts()
+        ph = pages[0].placeholders.get(slot='content')
+        plugin = add_plugin(
+            ph, 'BlogLatestEntriesPlugin', language='en', app_config=self.app_config_1
+        )
+        plugin_class = plugin.get_plugin_class_instance()
+        with self.settings(BLOG_METRICS_SINK='djangocms_blog.metrics.MemorySink'):
+            context = self.get_plugin_context(pages[0], 'en', plugin)
+            context = plugin_class.render(context, plugin, ph)
+        # posts are loaded within the measurement
+        self.assertTrue(MemorySink.records[0][1]['queries'] > 0)
+        with self.assertNumQueries(0):
+            for post in context['posts_list']:
+                post.author, list(post.categories.all()), list(post.tags.all())
+
+    def test_view_metrics(self):
+        pages = self.get_pages()
+        self.get_posts()
+        request = self.get_request(pages[1], 'en', AnonymousUser())
+        with self.settings(BLOG_METRICS_SINK='djangocms_blog.metrics.MemorySink'):
+            with smart_override('en'):
+                response = PostListView.as_view()(request)
+                # template responses are measured until rendered
+                self.assertEqual(MemorySink.records, [])
+                response.render()
+        self.assertEqual(len(MemorySink.records), 1)
+        name, metrics, tags = MemorySink.records[0]
+        self.assertEqual(name, 'view.PostListView')
+        self.assertEqual(tags['path'], request.path)
+        self.assertTrue(metrics['queries'] > 0)
+        # post item and its thumbnail metadata are not cached yet
+        self.assertEqual(metrics['cache_misses'], 2)
+
+    def test_statsd_format(self):
+        sink = StatsdSink()
+        self.assertEqual(
+            sink.format('view.PostListView', {'time': 1.5, 'queries': 3}).split('\n'),
+            ['djangocms_blog.view.PostListView.queries:3|c',
+             'djangocms_blog.view.PostListView.time:1.5|ms']
+        )
+        tags = {'plugin': 12, 'placeholder': 'content', 'path': '/en/blog/'}
+        self.assertEqual(
+            sink.format('plugin.BlogTagsPlugin', {'queries': 3}, tags),
+            'djangocms_blog.plugin.BlogTagsPlugin.queries:3|c'
+            '|#path:en_blog,placeholder:content,plugin:12'
+        )
+        with self.settings(BLOG_METRICS_STATSD_TAGS=False):
+            sink = StatsdSink()
+        self.assertEqual(
+            sink.format('plugin.BlogTagsPlugin', {'queries': 3}, tags),
+            'djangocms_blog.plugin.BlogTagsPlugin.en_blog.content.12.queries:3|c'
+        )
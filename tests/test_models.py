@@ -3,6 +3,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 import re
 from copy import deepcopy
+from datetime import timedelta
 
 import parler
 from cms.api import add_plugin
@@ -20,9 +21,11 @@ from django.utils.translation import get_language, override
 from djangocms_helper.utils import CMS_30
 from taggit.models import Tag
 
+from djangocms_blog.cache import get_cache_key
 from djangocms_blog.cms_appconfig import BlogConfig, BlogConfigForm
 from djangocms_blog.models import BlogCategory, Post
 from djangocms_blog.settings import get_setting
+from djangocms_blog.sitemaps import BlogSitemap
 
 from .base import BaseTest
 
@@ -342,6 +345,19 @@ class ModelsTest(BaseTest):
                 post.get_absolute_url()
             )
         )
+        # prefetched categories are used
+        url = post.get_absolute_url()
+        prefetched = Post.objects.select_related('app_config').prefetch_related(
+            'translations', 'categories', 'categories__translations'
+        ).get(pk=post.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(prefetched.get_absolute_url(), url)
+        # posts without categories
+        category_slug = post.categories.first().slug
+        post.categories.clear()
+        url = post.get_absolute_url()
+        self.assertTrue(re.match(r'.*/%s/$' % post.slug, url))
+        self.assertNotIn(category_slug, url)
 
         # slug only
         self.app_config_1.app_data.config.url_patterns = 'category'
@@ -349,6 +365,56 @@ class ModelsTest(BaseTest):
         post.app_config = self.app_config_1
         self.assertTrue(re.match(r'.*/%s/$' % post.slug, post.get_absolute_url()))
 
+    def test_content_modified(self):
+        posts = self.get_posts()
+        self.assertIsNone(posts[0].content_modified)
+        self.assertEqual(posts[0].last_modified, posts[0].date_modified)
+
+        plugin = add_plugin(posts[0].content, 'TextPlugin', language='en', body='content')
+        post = Post.objects.get(pk=posts[0].pk)
+        self.assertIsNotNone(post.content_modified)
+        self.assertEqual(post.last_modified, post.content_modified)
+        # plugins of other placeholders don't change the post
+        self.assertIsNone(Post.objects.get(pk=posts[1].pk).content_modified)
+        sitemap = BlogSitemap(self.app_config_1.namespace, 'en')
+        with override('en'):
+            self.get_pages()
+            item = sitemap.paginator.page(1).object_list[0]
+        self.assertEqual(sitemap.lastmod(item), post.content_modified)
+
+        previous = post.content_modified
+        plugin.body = 'changed content'
+        plugin.save()
+        post = Post.objects.get(pk=posts[0].pk)
+        self.assertGreater(post.content_modified, previous)
+
+        # moved plugin: both posts are changed, along with their namespaces cached data
+        previous = post.content_modified
+        keys = [get_cache_key(post.app_config.namespace) for post in (posts[0], posts[3])]
+        plugin.placeholder = posts[3].content
+        plugin.save()
+        self.assertGreater(Post.objects.get(pk=posts[0].pk).content_modified, previous)
+        self.assertIsNotNone(Post.objects.get(pk=posts[3].pk).content_modified)
+        self.assertNotEqual(
+            [get_cache_key(post.app_config.namespace) for post in (posts[0], posts[3])], keys
+        )
+
+        previous = Post.objects.get(pk=posts[3].pk).content_modified
+        plugin.delete()
+        self.assertGreater(Post.objects.get(pk=posts[3].pk).content_modified, previous)
+
+    def test_tags_invalidate_cache(self):
+        posts = self.get_posts()
+        namespace = posts[0].app_config.namespace
+        other_key = get_cache_key(posts[3].app_config.namespace)
+        for change in (lambda: posts[0].tags.add('tag 1', 'tag 2'),
+                       lambda: posts[0].tags.remove('tag 1'),
+                       lambda: posts[0].tags.clear()):
+            key = get_cache_key(namespace)
+            change()
+            self.assertNotEqual(get_cache_key(namespace), key)
+        self.assertEqual(get_cache_key(posts[3].app_config.namespace), other_key)
+
     def test_manager(self):
         post1 = self._get_post(self._post_data[0]['en'])
         post2 = self._get_post(self._post_data[1]['en'])
@@ -465,6 +531,52 @@ class ModelsTest(BaseTest):
         post1.save()
         self.assertEqual(len(plugin.get_posts(request)), 1)
 
+    def test_plugin_latest_snapshot(self):
+        post1 = self._get_post(self._post_data[0]['en'])
+        post2 = self._get_post(self._post_data[1]['en'])
+        post1.publish = True
+        post1.save()
+        post2.publish = True
+        post2.save()
+        post1.tags.add('tag 1')
+        post2.tags.add('tag 2')
+        category_2 = BlogCategory.objects.create(name='category 2', app_config=self.app_config_1)
+        post1.categories.add(category_2)
+        request = self.get_page_request('/', AnonymousUser(), r'/en/blog/', edit=False)
+        plugin = add_plugin(post1.content, 'BlogLatestEntriesPlugin', language='en', app_config=self.app_config_1)
+        plugin.tags.add(Tag.objects.get(slug='tag-1'), Tag.objects.get(slug='tag-2'))
+        plugin.update_snapshot()
+        self.assertEqual(set(plugin.get_posts(request)), set([post1, post2]))
+
+        plugin = self.reload_model(plugin)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(plugin.get_posts(request))), 2)
+
+        # changing categories resets the snapshot
+        plugin.categories.add(category_2)
+        self.assertEqual(plugin.categories_snapshot, None)
+        self.assertEqual(list(plugin.get_posts(request)), [post1])
+        plugin = self.reload_model(plugin)
+        self.assertEqual(plugin.categories_snapshot, force_text(category_2.pk))
+        with self.assertNumQueries(1):
+            self.assertEqual(list(plugin.get_posts(request)), [post1])
+
+        # changing tags resets the snapshot
+        plugin.tags.remove(Tag.objects.get(slug='tag-1'))
+        plugin = self.reload_model(plugin)
+        self.assertEqual(plugin.tags_snapshot, None)
+        self.assertEqual(list(plugin.get_posts(request)), [])
+        plugin.tags.add(Tag.objects.get(slug='tag-1'))
+        plugin = self.reload_model(plugin)
+        self.assertEqual(plugin.tags_snapshot, None)
+        self.assertEqual(list(plugin.get_posts(request)), [post1])
+        plugin = self.reload_model(plugin)
+        self.assertEqual(
+            plugin.tags_snapshot, '%s,%s' % tuple(sorted(Tag.objects.filter(
+                slug__in=['tag-1', 'tag-2']
+            ).values_list('pk', flat=True)))
+        )
+
     def test_copy_plugin_latest(self):
         post1 = self._get_post(self._post_data[0]['en'])
         post2 = self._get_post(self._post_data[1]['en'])
@@ -481,6 +593,7 @@ class ModelsTest(BaseTest):
         new = downcast_plugins(post2.content.cmsplugin_set.all())
         self.assertEqual(set(new[0].tags.all()), set([tag1, tag2]))
         self.assertEqual(set(new[0].tags.all()), set(plugin.tags.all()))
+        self.assertEqual(new[0].tags_snapshot, '%s,%s' % (tag1.pk, tag2.pk))
 
     def test_plugin_author(self):
         post1 = self._get_post(self._post_data[0]['en'])
@@ -501,6 +614,17 @@ class ModelsTest(BaseTest):
         self.assertEqual(len(plugin.get_posts(request)), 2)
         self.assertEqual(plugin.get_authors()[0].count, 2)
 
+        # counts follow the same visibility rules as the posts
+        post2.date_published = now() + timedelta(days=1)
+        post2.save()
+        plugin.authors.add(self.user_staff)
+        with self.assertNumQueries(2):
+            authors = plugin.get_authors()
+        self.assertEqual(
+            dict((author.pk, author.count) for author in authors),
+            {self.user.pk: 1, self.user_staff.pk: 0}
+        )
+
     def test_copy_plugin_author(self):
         post1 = self._get_post(self._post_data[0]['en'])
         post2 = self._get_post(self._post_data[1]['en'])
@@ -3,13 +3,18 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 import os.path
 import re
+from datetime import timedelta
 
 from cms.api import add_plugin
+from django.contrib.sites.models import Site
 from django.core.urlresolvers import reverse
 from django.utils.timezone import now
+from mock import patch
 from taggit.models import Tag
 
-from djangocms_blog.models import BlogCategory
+from djangocms_blog import cache, managers
+from djangocms_blog.loader import BlogDataLoader
+from djangocms_blog.models import BlogCategory, Post
 
 from .base import BaseTest
 
@@ -110,6 +115,32 @@ class PluginTest(BaseTest):
         self.assertTrue(context['categories'])
         self.assertEqual(list(context['categories']), [self.category_1])
 
+        child = BlogCategory.objects.create(
+            name='a child', parent=self.category_1, app_config=self.app_config_1
+        )
+        empty = BlogCategory.objects.create(name='an empty one', app_config=self.app_config_1)
+        posts[1].categories.add(child)
+        # data are shared within the request: a new one is needed to see the changes
+        context = self.get_plugin_context(pages[0], 'en', plugin, edit=True)
+        # config, categories, translations and counts
+        with self.assertNumQueries(4):
+            context = plugin_class.render(context, plugin, ph)
+        self.assertEqual(context['categories'], [empty, self.category_1, child])
+        self.assertEqual([category.depth for category in context['categories']], [0, 0, 1])
+        self.assertEqual([category.count for category in context['categories']], [0, 2, 1])
+        rendered = plugin.render_plugin(context, ph)
+        self.assertTrue(rendered.find('blog-category-depth-1') > -1)
+
+        with self.settings(BLOG_CATEGORY_PLUGIN_HIDE_EMPTY=True):
+            # empty categories are filtered by the categories query, counts are shared
+            with self.assertNumQueries(2):
+                context = plugin_class.render(context, plugin, ph)
+        self.assertEqual(context['categories'], [self.category_1, child])
+        self.assertEqual(
+            set(BlogDataLoader().get_categories(self.app_config_1.pk, hide_empty=True)),
+            set([self.category_1, child])
+        )
+
     def test_blog_archive_plugin(self):
         pages = self.get_pages()
         posts = self.get_posts()
@@ -128,6 +159,7 @@ class PluginTest(BaseTest):
 
         posts[1].publish = False
         posts[1].save()
+        context = self.get_plugin_context(pages[0], 'en', plugin, edit=True)
         context = plugin_class.render(context, plugin, ph)
         self.assertEqual(context['dates'][0]['date'].date(), now().replace(year=now().year, month=now().month, day=1).date())
         self.assertEqual(context['dates'][0]['count'], 1)
@@ -148,3 +180,98 @@ class PluginTest(BaseTest):
         self.assertEqual(plugin_class.get_render_template(context, plugin, ph), os.path.join('whatever', plugin_class.base_render_template))
         self.app_config_1.app_data.config.template_prefix = ''
         self.app_config_1.save()
+
+    def test_plugin_latest_cached(self):
+        pages = self.get_pages()
+        posts = self.get_posts()
+        ph = pages[0].placeholders.get(slot='content')
+        plugin = add_plugin(
+            ph, 'BlogLatestEntriesPluginCached', language='en', app_config=self.app_config_1
+        )
+        plugin_class = plugin.get_plugin_class_instance()
+
+        context = self.get_plugin_context(pages[0], 'en', plugin)
+        context = plugin_class.render(context, plugin, ph)
+        self.assertEqual(context['posts_list'], [posts[0]])
+        with self.assertNumQueries(0):
+            context = plugin_class.render(context, plugin, ph)
+        self.assertEqual(context['posts_list'], [posts[0]])
+        rendered = plugin.render_plugin(context, ph)
+        self.assertTrue(rendered.find('<article id="post-first-post"') > -1)
+
+        # saving a post invalidates the cache
+        posts[1].publish = True
+        posts[1].save()
+        context = plugin_class.render(context, plugin, ph)
+        self.assertEqual(set(context['posts_list']), set([posts[0], posts[1]]))
+
+        # scheduled posts are shown once their publication date is reached
+        posts[2].publish = True
+        posts[2].date_published = now() + timedelta(hours=1)
+        posts[2].save()
+        context = plugin_class.render(context, plugin, ph)
+        self.assertEqual(set(context['posts_list']), set([posts[0], posts[1]]))
+        later = now() + timedelta(hours=2)
+        with patch.object(cache, 'now', return_value=later):
+            with patch.object(managers, 'now', return_value=later):
+                context = plugin_class.render(context, plugin, ph)
+        self.assertEqual(set(context['posts_list']), set([posts[0], posts[1], posts[2]]))
+
+    def test_loader_counts(self):
+        posts = self.get_posts()
+        for post in posts:
+            post.publish = True
+            post.save()
+        Post.objects.filter(pk=posts[1].pk).update(date_published=now() - timedelta(days=70))
+        Post.objects.filter(pk=posts[2].pk).update(
+            date_published=now() - timedelta(days=400), author=None
+        )
+        Site.objects.get_current()
+        for use_tz in (True, False):
+            with self.settings(USE_TZ=use_tz):
+                loader = BlogDataLoader()
+                with self.assertNumQueries(1):
+                    months = loader.get_months()
+                self.assertEqual(
+                    [(month['date'].date(), month['count']) for month in months],
+                    [(month['date'].date(), month['count'])
+                     for month in Post.objects.get_months(Post.objects.published())]
+                )
+                self.assertEqual(len(months), 3)
+                with self.assertNumQueries(1):
+                    self.assertEqual(loader.get_author_counts(), {self.user.pk: 3, None: 1})
+                self.assertEqual(
+                    BlogDataLoader().get_author_counts(self.app_config_1.pk), {self.user.pk: 2, None: 1}
+                )
+
+    def test_plugins_shared_loader(self):
+        pages = self.get_pages()
+        posts = self.get_posts()
+        posts[0].tags.add('tag 1')
+        ph = pages[0].placeholders.get(slot='content')
+        plugins = [
+            add_plugin(ph, plugin_type, language='en', app_config=self.app_config_1)
+            for plugin_type in ('BlogTagsPlugin', 'BlogCategoryPlugin', 'BlogArchivePlugin')
+        ]
+        author_plugin = add_plugin(
+            ph, 'BlogAuthorPostsPlugin', language='en', app_config=self.app_config_1
+        )
+        author_plugin.authors.add(self.user)
+        plugins.append(author_plugin)
+
+        context = self.get_plugin_context(pages[0], 'en', plugins[0])
+        for plugin in plugins:
+            plugin = self.reload_model(plugin)
+            context = plugin.get_plugin_class_instance().render(context, plugin, ph)
+        self.assertEqual([tag.name for tag in context['tags']], ['tag 1'])
+        self.assertEqual(context['categories'], [self.category_1])
+        self.assertEqual(context['categories'][0].count, 1)
+        self.assertEqual(context['dates'][0]['count'], 1)
+        self.assertEqual(context['authors_list'][0].count, 1)
+
+        # a second set of plugins only loads the authors
+        with self.assertNumQueries(1):
+            for plugin in plugins:
+                context = plugin.get_plugin_class_instance().render(context, plugin, ph)
+        rendered = plugins[1].render_plugin(context, ph)
+        self.assertTrue(rendered.find('category 1') > -1)
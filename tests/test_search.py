@@ -1,9 +1,18 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 
+import json
+import os
+import shutil
+import tempfile
+
 from cms.api import add_plugin
+from django.core.management import call_command
+from django.utils.six import StringIO
+from haystack.backends.simple_backend import SimpleSearchBackend
 from haystack.constants import DEFAULT_ALIAS
 from haystack.query import SearchQuerySet
+from mock import patch
 
 from djangocms_blog.models import Post
 
@@ -52,7 +61,70 @@ class BlogIndexingTests(BaseTest):
         self.assertEqual(post.get_absolute_url(), indexed['url'])
         #self.assertEqual(post.date_published.strftime("%Y-%m-%d %H:%M:%S"), indexed['pub_date'])
 
+    def test_index_queryset_chunks(self):
+        posts = self.get_posts()
+        for post in posts:
+            post.publish = True
+            post.save()
+            post.tags.add('a tag', 'other tag')
+            add_plugin(post.content, 'TextPlugin', language='en', body='test body')
+            add_plugin(post.content, 'TextPlugin', language='en', body='other body')
+            add_plugin(post.content, 'TextPlugin', language='it', body='corpo')
+
+        index = self.get_post_index()
+        queryset = index.index_queryset(DEFAULT_ALIAS)
+        # posts, translations, categories, categories translations, tags,
+        # plugins and plugins of each type, whatever the chunk size
+        for start, end in ((0, 1), (1, 4)):
+            with self.assertNumQueries(7):
+                chunk = list(queryset[start:end])
+                prepared = [index.full_prepare(post) for post in chunk]
+            self.assertEqual(len(prepared), end - start)
+            for data in prepared:
+                self.assertTrue(data['text'].endswith('test body other body'))
+                self.assertNotIn('corpo', data['text'])
+                self.assertIn('a tag other tag', data['text'])
+
     def test_searchqueryset(self):
         posts = self.get_posts()
         all_results = SearchQuerySet().models(Post)
         self.assertEqual(len(posts), len(all_results))
+
+    def test_reindex_command(self):
+        posts = self.get_posts()
+        for post in posts:
+            post.publish = True
+            post.save()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        state = os.path.join(directory, 'state.json')
+        sent = []
+
+        def update(backend, index, iterable, commit=True):
+            sent.append([post.pk for post in iterable])
+
+        def reindex(**kwargs):
+            del sent[:]
+            output = StringIO()
+            with patch.object(SimpleSearchBackend, 'update', update):
+                call_command('blog_reindex', stdout=output, batch_size=3, state=state, **kwargs)
+            return output.getvalue()
+
+        pks = sorted(post.pk for post in posts)
+        self.assertTrue(reindex().startswith('4 posts indexed in'))
+        self.assertEqual(sent, [pks[:3], pks[3:]])
+        with open(state) as state_file:
+            self.assertEqual(json.load(state_file), {})
+
+        # interrupted run
+        with open(state, 'w') as state_file:
+            json.dump({DEFAULT_ALIAS: pks[2]}, state_file)
+        self.assertTrue(reindex(verbosity=2).startswith(
+            'default: posts %s-%s, 1 indexed' % (pks[3], pks[3])
+        ))
+        self.assertEqual(sent, [pks[3:]])
+
+        with open(state, 'w') as state_file:
+            json.dump({DEFAULT_ALIAS: pks[2]}, state_file)
+        reindex(restart=True)
+        self.assertEqual(sent, [pks[:3], pks[3:]])
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+import gzip
+import os
+import shutil
+import tempfile
+from contextlib import closing
+
+from django.core.management import CommandError, call_command
+from django.utils.six import StringIO
+from parler.utils.context import smart_override
+
+from djangocms_blog.sitemaps.files import INDEX_FILE, STATE_FILE
+
+from .base import BaseTest
+
+
+class SitemapFilesTest(BaseTest):
+
+    def setUp(self):
+        super(SitemapFilesTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def read(self, name):
+        # GzipFile is not a context manager on python 2.6
+        with closing(gzip.open(os.path.join(self.directory, name))) as sitemap_file:
+            return sitemap_file.read().decode('utf-8')
+
+    def generate(self, **kwargs):
+        output = StringIO()
+        call_command('blog_sitemaps', stdout=output, directory=self.directory, **kwargs)
+        return output.getvalue().strip()
+
+    def test_sitemaps_command(self):
+        posts = self.get_posts()
+        self.get_pages()
+        self.reload_urlconf()
+
+        self.assertEqual(self.generate(), '4 sitemaps: 4 generated, 0 skipped, 0 removed')
+        self.assertEqual(sorted(os.listdir(self.directory)), [
+            'sitemap-blog-sample_app-en-1.xml.gz', 'sitemap-blog-sample_app-it-1.xml.gz',
+            'sitemap-blog-sample_app2-en-1.xml.gz', 'sitemap-blog-sample_app2-it-1.xml.gz',
+            STATE_FILE, INDEX_FILE,
+        ])
+        index = self.read(INDEX_FILE)
+        self.assertTrue(
+            '<loc>http://example.com/sitemap-blog-sample_app-en-1.xml.gz</loc>' in index
+        )
+        with smart_override('it'):
+            self.assertTrue(
+                'hreflang="it" href="http://example.com%s"' % posts[0].get_absolute_url() in
+                self.read('sitemap-blog-sample_app-en-1.xml.gz')
+            )
+
+        # only the changed sitemaps are written
+        self.assertEqual(self.generate(), '4 sitemaps: 0 generated, 4 skipped, 0 removed')
+        posts[0].save()
+        self.assertEqual(self.generate(), '4 sitemaps: 2 generated, 2 skipped, 0 removed')
+        posts[3].publish = False
+        posts[3].save()
+        self.assertEqual(self.generate(), '2 sitemaps: 0 generated, 2 skipped, 2 removed')
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, 'sitemap-blog-sample_app2-en-1.xml.gz')
+        ))
+        self.assertEqual(
+            self.generate(force=True, url='http://static.example.com/sitemaps'),
+            '2 sitemaps: 2 generated, 0 skipped, 0 removed'
+        )
+        self.assertTrue(
+            'http://static.example.com/sitemaps/sitemap-blog-sample_app-en-1.xml.gz' in
+            self.read(INDEX_FILE)
+        )
+
+    def test_sitemaps_command_directory(self):
+        with self.assertRaises(CommandError):
+            call_command('blog_sitemaps')
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.utils.six import StringIO
+from easy_thumbnails.files import get_thumbnailer
+from mock import patch
+
+from djangocms_blog import thumbnails
+from djangocms_blog.thumbnails import (
+    GENERATED, SKIPPED, get_metadata_cache_key, get_post_thumbnails, get_thumbnails,
+    pregenerate_thumbnails,
+)
+
+from .base import BaseTest
+
+
+class ThumbnailsTest(BaseTest):
+
+    def test_post_thumbnails(self):
+        posts = self.get_posts()
+        thumbnails = get_post_thumbnails(posts[0])
+        self.assertEqual(len(thumbnails), 2)
+        self.assertEqual(thumbnails[0][1]['size'], (120, 120))
+        self.assertEqual(thumbnails[1][1]['size'], (640, 120))
+
+        posts[0].main_image_thumbnail = self.thumb_1
+        posts[0].save()
+        thumbnails = get_post_thumbnails(posts[0])
+        self.assertEqual(thumbnails[0][1]['size'], (100, 100))
+
+        posts[1].main_image = None
+        posts[1].save()
+        self.assertEqual(get_post_thumbnails(posts[1]), [])
+        self.assertEqual(len(list(get_thumbnails())), 6)
+
+    def test_pregenerate_thumbnails(self):
+        posts = self.get_posts()
+        thumbnails = get_post_thumbnails(posts[0])
+        results = list(pregenerate_thumbnails(thumbnails))
+        self.assertEqual(results, [(posts[0].main_image.pk, GENERATED)] * 2)
+        for image, options in thumbnails:
+            self.assertTrue(get_thumbnailer(image).get_existing_thumbnail(options))
+        results = list(pregenerate_thumbnails(thumbnails))
+        self.assertEqual(results, [(posts[0].main_image.pk, SKIPPED)] * 2)
+
+    def test_thumbnail_metadata(self):
+        posts = self.get_posts()
+        image, options = get_post_thumbnails(posts[0])[0]
+        list(pregenerate_thumbnails([(image, options)]))
+        metadata = cache.get(get_metadata_cache_key(image, options))
+        self.assertEqual(metadata['width'], 120)
+        self.assertEqual(metadata['height'], 120)
+        self.assertTrue(metadata['url'].endswith('.jpg'))
+
+        template = Template(
+            '{% load djangocms_blog %}'
+            '{% blog_thumbnail post.main_image post.thumbnail_options as thumb %}'
+            '{{ thumb.url }} {{ thumb.width }}x{{ thumb.height }}'
+        )
+        with patch.object(thumbnails, 'get_thumbnailer') as thumbnailer:
+            rendered = template.render(Context({'post': posts[0]}))
+            self.assertFalse(thumbnailer.called)
+        self.assertEqual(rendered, '%s 120x120' % metadata['url'])
+
+        # metadata are stored on first render if missing
+        cache.clear()
+        self.assertEqual(template.render(Context({'post': posts[0]})), rendered)
+        self.assertEqual(cache.get(get_metadata_cache_key(image, options)), metadata)
+
+    def test_pregenerate_on_save(self):
+        with self.settings(BLOG_THUMBNAIL_PREGENERATE=True):
+            posts = self.get_posts()
+        results = list(pregenerate_thumbnails(get_post_thumbnails(posts[0])))
+        self.assertEqual(results, [(posts[0].main_image.pk, SKIPPED)] * 2)
+
+    def test_thumbnails_command(self):
+        self.get_posts()
+        output = StringIO()
+        call_command('blog_thumbnails', stdout=output, published=True)
+        self.assertEqual(output.getvalue().strip(), '4 thumbnails: 4 generated, 0 skipped, 0 failed')
+        output = StringIO()
+        call_command('blog_thumbnails', stdout=output)
+        self.assertEqual(output.getvalue().strip(), '8 thumbnails: 4 generated, 4 skipped, 0 failed')
@@ -28,6 +28,9 @@ urlpatterns = patterns(
             'cmspages': CMSSitemap, 'blog': BlogSitemap,
         }
     }),
+    url(r'^blog-sitemap\.xml$', 'djangocms_blog.sitemaps.index'),
+    url(r'^sitemap-(?P<section>.+)\.xml$', 'djangocms_blog.sitemaps.sitemap',
+        name='blog-sitemap'),
 )
 
 urlpatterns += staticfiles_urlpatterns()
@@ -2,23 +2,34 @@
 from __future__ import absolute_import, print_function, unicode_literals
 
 import os.path
+from calendar import timegm
+from gzip import GzipFile
 
 from aldryn_apphooks_config.utils import get_app_instance
+from cms.api import add_plugin
 from cms.toolbar.items import ModalItem
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import ImproperlyConfigured
 from django.core.urlresolvers import reverse
 from django.http import Http404
+from django.utils.http import http_date
+from django.utils.six import BytesIO
 from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
+from mock import patch
 from parler.tests.utils import override_parler_settings
 from parler.utils.conf import add_default_language_settings
 from parler.utils.context import smart_override, switch_language
 
-from djangocms_blog.feeds import LatestEntriesFeed, TagFeed
-from djangocms_blog.models import BLOG_CURRENT_NAMESPACE
+from djangocms_blog import feeds
+from djangocms_blog.feeds import (
+    AuthorFeed, CategoryFeed, LatestEntriesAtomFeed, LatestEntriesFeed, TagFeed,
+)
+from djangocms_blog.models import BLOG_CURRENT_NAMESPACE, BlogCategory, Post
 from djangocms_blog.settings import get_setting
-from djangocms_blog.sitemaps import BlogSitemap
+from djangocms_blog.sitemaps import (
+    BlogSitemap, get_sitemaps, index as sitemap_index, sitemap as sitemap_view,
+)
 from djangocms_blog.views import (
     AuthorEntriesView, CategoryEntriesView, PostArchiveView, PostDetailView, PostListView,
     TaggedListView,
@@ -331,6 +342,12 @@ class ViewTest(BaseTest):
                 self.assertContains(xml, posts[0].get_absolute_url())
                 self.assertContains(xml, 'Blog articles on example.com')
 
+                # shared instance: the request state is not stored on it
+                feed = LatestEntriesFeed()
+                feed(request)
+                for attribute in ('namespace', 'config', 'request', 'items_data'):
+                    self.assertFalse(hasattr(feed, attribute))
+
         with smart_override('it'):
             with switch_language(posts[0], 'it'):
                 feed = LatestEntriesFeed()
@@ -346,6 +363,185 @@ class ViewTest(BaseTest):
                 feed.config = self.app_config_1
                 self.assertEqual(list(feed.items('tag-2')), [posts[0]])
 
+    def test_feed_cache(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+
+        def get_request(**headers):
+            request = self.get_page_request(pages[1], self.user, path='/en/page-two/feed/')
+            request.META.update(headers)
+            return request
+
+        def get_feed(**headers):
+            return LatestEntriesFeed()(get_request(**headers))
+
+        with smart_override('en'):
+            self.reload_urlconf()
+            response = get_feed()
+            self.assertContains(response, posts[0].get_absolute_url())
+            etag = response['ETag']
+            last_modified = response['Last-Modified']
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(last_modified, http_date(timegm(
+                posts[0].date_modified.utctimetuple()
+            )))
+
+            # cached body: only the apphook config is loaded
+            request = get_request()
+            with self.assertNumQueries(1):
+                response = LatestEntriesFeed()(request)
+            self.assertEqual(response['ETag'], etag)
+            self.assertContains(response, posts[0].get_absolute_url())
+
+            response = get_feed(HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertNotEqual(response['ETag'], etag)
+            content = GzipFile(fileobj=BytesIO(response.content)).read()
+            self.assertEqual(content, get_feed().content)
+
+            response = get_feed(HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(get_feed(HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+            posts[1].publish = True
+            posts[1].save()
+            response = get_feed(HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertContains(response, posts[1].get_absolute_url())
+
+    def test_tag_feed(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        posts[0].tags.add('tag 1', 'tag 2')
+        posts[3].tags.add('tag 2')
+
+        with smart_override('en'):
+            self.reload_urlconf()
+            request = self.get_page_request(pages[1], self.user, path='/en/page-two/tag/tag-2/feed/')
+            # config, next transition, items, items data (post, translations, categories)
+            with self.assertNumQueries(8):
+                response = TagFeed()(request, tag='tag-2')
+            self.assertContains(response, posts[0].get_absolute_url())
+            self.assertNotContains(response, posts[3].get_absolute_url())
+
+            posts[1].tags.add('tag 2')
+            posts[1].publish = True
+            posts[1].save()
+            request = self.get_page_request(pages[1], self.user, path='/en/page-two/tag/tag-2/feed/')
+            with self.assertNumQueries(8):
+                response = TagFeed()(request, tag='tag-2')
+            self.assertContains(response, posts[0].get_absolute_url())
+            self.assertContains(response, posts[1].get_absolute_url())
+
+            with self.assertNumQueries(1):
+                TagFeed()(request, tag='tag-2')
+
+    def test_category_author_feeds(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        category = BlogCategory.objects.create(name='category 2', app_config=self.app_config_1)
+        category.set_current_language('en')
+        posts[1].publish = True
+        posts[1].save()
+        posts[1].categories.add(category)
+
+        with smart_override('en'):
+            self.reload_urlconf()
+            request = self.get_page_request(pages[1], self.user, path='/en/page-two/feed/')
+            LatestEntriesFeed()(request)
+
+            # items are shared with the latest entries feed: config, next transition,
+            # category and items
+            request = self.get_page_request(
+                pages[1], self.user, path='/en/page-two/category/category-2/feed/'
+            )
+            with self.assertNumQueries(5):
+                response = CategoryFeed()(request, category='category-2')
+            self.assertContains(response, category.get_absolute_url())
+            self.assertContains(response, posts[1].get_absolute_url())
+            self.assertNotContains(response, posts[0].get_absolute_url())
+            with self.assertRaises(Http404):
+                CategoryFeed()(request, category='unknown')
+
+            request = self.get_page_request(
+                pages[1], self.user, path='/en/page-two/author/admin/feed/'
+            )
+            response = AuthorFeed()(request, username=self.user.get_username())
+            self.assertContains(response, posts[0].get_absolute_url())
+            self.assertContains(response, posts[1].get_absolute_url())
+            with self.assertRaises(Http404):
+                AuthorFeed()(request, username='unknown')
+
+    def test_atom_feed(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        plugin = add_plugin(posts[0].content, 'TextPlugin', language='en', body='first content')
+
+        with smart_override('en'):
+            self.reload_urlconf()
+            request = self.get_page_request(pages[1], self.user, path='/en/page-two/feed/atom/')
+            feed = LatestEntriesAtomFeed()
+            response = feed(request)
+            self.assertFalse(hasattr(feed, 'contents'))
+            self.assertFalse(hasattr(feed, 'request'))
+            self.assertContains(response, '<feed xmlns="http://www.w3.org/2005/Atom"')
+            self.assertContains(response, '<summary type="html">&lt;p&gt;first line&lt;/p&gt;</summary>')
+            self.assertContains(response, '<content type="html">first content</content>')
+
+            # cached feed: only the apphook configuration is loaded
+            with self.assertNumQueries(1):
+                LatestEntriesAtomFeed()(request)
+
+            # rendered content is cached
+            post = Post.objects.get(pk=posts[0].pk)
+            with patch.object(feeds.CONTENT_TEMPLATE, 'render') as render:
+                self.assertEqual(
+                    feeds.get_posts_content([post], request, 'en'), {post.pk: 'first content'}
+                )
+                self.assertFalse(render.called)
+
+            plugin.body = 'changed content'
+            plugin.save()
+            response = LatestEntriesAtomFeed()(request)
+            self.assertContains(response, '<content type="html">changed content</content>')
+
+    def test_feed_category_permalinks(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        posts[1].publish = True
+        posts[1].save()
+        posts[1].categories.clear()
+        self.app_config_1.app_data.config.url_patterns = 'category'
+        self.app_config_1.save()
+        try:
+            with smart_override('en'):
+                self.reload_urlconf()
+                request = self.get_page_request(pages[1], self.user, path='/en/page-two/feed/')
+                response = LatestEntriesFeed()(request)
+                for post in posts[:2]:
+                    self.assertContains(response, post.get_absolute_url())
+                self.assertNotContains(response, '/None/')
+        finally:
+            self.app_config_1.app_data.config.url_patterns = 'full_date'
+            self.app_config_1.save()
+
+    def test_feed_items_count(self):
+        posts = self.get_posts()
+        posts[1].publish = True
+        posts[1].save()
+
+        with smart_override('en'):
+            feed = LatestEntriesFeed()
+            feed.namespace, feed.config = self.app_config_1.namespace, self.app_config_1
+            self.assertEqual(list(feed.items()), [posts[1], posts[0]])
+            self.app_config_1.app_data.config.feed_latest_items = 1
+            try:
+                self.assertEqual(list(feed.items()), [posts[1]])
+            finally:
+                self.app_config_1.app_data.config.feed_latest_items = None
+
     def test_sitemap(self):
         posts = self.get_posts()
         self.get_pages()
@@ -357,8 +553,12 @@ class ViewTest(BaseTest):
         posts[0].set_current_language('en')
 
         sitemap = BlogSitemap()
-        self.assertEqual(len(sitemap.items()), 6)
-        for item in sitemap.items():
+        self.assertEqual(sitemap.paginator.count, 6)
+        # count, page items, translations slugs and apphook configs
+        with self.assertNumQueries(4):
+            items = sitemap.paginator.page(1).object_list
+        self.assertEqual(len(items), 6)
+        for item in items:
             self.assertEqual(sitemap.lastmod(item).date(), now().date())
             self.assertEqual(
                 sitemap.priority(item), get_setting('SITEMAP_PRIORITY_DEFAULT')
@@ -366,10 +566,83 @@ class ViewTest(BaseTest):
             self.assertEqual(
                 sitemap.changefreq(item), get_setting('SITEMAP_CHANGEFREQ_DEFAULT')
             )
-            with smart_override(item.get_current_language()):
+            post = Post.objects.get(pk=item['master_id'])
+            with smart_override(item['language_code']):
+                self.assertEqual(
+                    sitemap.location(item), post.get_absolute_url()
+                )
+            alternates = []
+            for language in ('en', 'it'):
+                with smart_override(language):
+                    alternates.append((language, post.get_absolute_url(language)))
+            self.assertEqual(item['alternates'], alternates)
+
+    def test_sitemap_sections(self):
+        posts = self.get_posts()
+        self.get_pages()
+        posts[1].publish = True
+        posts[1].save()
+        self.app_config_1.app_data.config.url_patterns = 'category'
+        self.app_config_1.save()
+
+        try:
+            sitemaps = get_sitemaps()
+            self.assertEqual(list(sitemaps.keys()), [
+                'blog-%s-%s' % (namespace, language) for namespace in ('sample_app', 'sample_app2')
+                for language in ('en', 'it', 'fr')
+            ])
+            sitemap = sitemaps['blog-sample_app-it']
+            sitemap.limit = 1
+            self.assertEqual(sitemap.paginator.num_pages, 2)
+            # count, page items, translations slugs, first categories, categories
+            # translations and apphook configs
+            with self.assertNumQueries(6):
+                items = sitemap.paginator.page(2).object_list
+            self.assertEqual([item['master_id'] for item in items], [posts[1].pk])
+            with smart_override('it'):
+                self.assertEqual(sitemap.location(items[0]), posts[1].get_absolute_url())
+            with smart_override('en'):
                 self.assertEqual(
-                    sitemap.location(item), item.get_absolute_url()
+                    items[0]['alternates'][0], ('en', posts[1].get_absolute_url())
+                )
+            self.assertEqual(sitemaps['blog-sample_app2-en'].paginator.count, 1)
+
+            self.reload_urlconf()
+            request = self.get_request(None, 'en', AnonymousUser(), path='/sitemap.xml')
+            response = sitemap_index(request, sitemap_url_name='blog-sitemap')
+            self.assertContains(response, '/sitemap-blog-sample_app-it.xml')
+            response = sitemap_view(request, section='blog-sample_app-en')
+            with smart_override('en'):
+                self.assertContains(response, posts[0].get_absolute_url())
+            with smart_override('it'):
+                self.assertContains(
+                    response, '<xhtml:link rel="alternate" hreflang="it" href="http://example.com%s"/>'
+                    % posts[0].get_absolute_url()
+                )
+
+            # uncategorized posts and categories not translated in the sitemap language
+            posts[1].categories.clear()
+            with smart_override('en'):
+                category = BlogCategory.objects.create(
+                    name='English only', app_config=self.app_config_1
                 )
+            posts[0].categories.clear()
+            posts[0].categories.add(category)
+            for language in ('en', 'it'):
+                sitemap = get_sitemaps()['blog-sample_app-%s' % language]
+                items = sitemap.paginator.page(1).object_list
+                self.assertEqual(len(items), 2)
+                for item in items:
+                    post = Post.objects.get(pk=item['master_id'])
+                    self.assertFalse('/None/' in sitemap.location(item))
+                    with smart_override(language):
+                        self.assertEqual(sitemap.location(item), post.get_absolute_url())
+                    for alternate_language, location in item['alternates']:
+                        with smart_override(alternate_language):
+                            self.assertEqual(location, post.get_absolute_url())
+        finally:
+            self.app_config_1.app_data.config.url_patterns = 'full_date'
+            self.app_config_1.save()
 
     def test_sitemap_config(self):
         posts = self.get_posts()
@@ -378,10 +651,10 @@ class ViewTest(BaseTest):
         self.app_config_1.save()
 
         sitemap = BlogSitemap()
-        self.assertEqual(len(sitemap.items()), 4)
-        for item in sitemap.items():
+        self.assertEqual(sitemap.paginator.count, 4)
+        for item in sitemap.paginator.page(1).object_list:
             self.assertEqual(sitemap.lastmod(item).date(), now().date())
-            if item.app_config == self.app_config_1:
+            if item['master__app_config_id'] == self.app_config_1.pk:
                 self.assertEqual(
                     sitemap.priority(item), '0.2'
                 )
@@ -419,3 +692,30 @@ class ViewTest(BaseTest):
             self.assertEqual(view_obj.get_template_names(), os.path.join('whatever', 'post_list.html'))
             self.app_config_1.app_data.config.template_prefix = ''
             self.app_config_1.save()
+
+    def test_post_list_item_cache(self):
+        posts = self.get_posts()
+        pages = self.get_pages()
+        # keep a single post in the first page in edit mode too
+        posts[1].delete()
+        posts[2].delete()
+
+        def render(user=None, edit=False):
+            if user:
+                request = self.get_page_request(pages[1], user, lang='en', edit=edit)
+            else:
+                request = self.get_request(pages[1], 'en', AnonymousUser())
+            response = PostListView.as_view()(request)
+            return response.render().content.decode('utf-8')
+
+        with smart_override('en'):
+            self.assertTrue('First post' in render())
+            # title changed without saving the post: the cached item is used
+            posts[0].translations.filter(language_code='en').update(title='Changed title')
+            self.assertTrue('First post' in render())
+            # edit mode bypasses the cache
+            self.assertTrue('Changed title' in render(self.user, edit=True))
+
+            post = self.reload_model(posts[0])
+            post.save()
+            self.assertTrue('Changed title' in render())